@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+bench - how fast does the poetry come
+
+times every generator and the code analyzer,
+throughput and per-call latency,
+and holds each run against a saved baseline
+"""
+
+import gc
+import os
+import random
+import sys
+import time
+from functools import lru_cache, partial
+from importlib import import_module
+
+HERE = os.path.dirname(os.path.realpath(__file__))
+BASELINE = os.path.join(HERE, "bench_baseline.json")
+
+# seconds spent per case measuring throughput
+TARGET_SECONDS = 0.3
+# timed loops per case; the fastest one counts
+REPEATS = 5
+# calls timed one at a time for latency percentiles
+LATENCY_SAMPLES = 2000
+# a drop in throughput beyond this fraction is a regression
+THRESHOLD = 0.25
+# size of the synthetic source for the large analyzer case
+LARGE_SOURCE_BYTES = 4 * 1024 * 1024
+
+
+def read_text(path: str) -> str:
+    with open(path) as f:
+        return f.read()
+
+
+@lru_cache(maxsize=None)
+def large_source(size: int = LARGE_SOURCE_BYTES) -> str:
+    """the repo's own python, repeated out to size characters"""
+    import glob
+
+    own = "\n".join(read_text(p) for p in sorted(glob.glob(os.path.join(HERE, "*.py"))))
+    return (own * (size // len(own) + 1))[:size]
+
+
+def cases(only: str = None) -> dict:
+    """name -> zero-argument callable, for the names containing only"""
+    # imported here so `bench.py --help` stays quick; its themes name cases
+    import murmur
+
+    # name -> maker of the callable, so a filter imports and builds
+    # (the 4MB source above all) only what it is going to run
+    makers = {}
+    for theme in [None, *murmur.THEMES]:
+        makers[f"murmur.murmur[{theme or 'default'}]"] = lambda t=theme: partial(murmur.murmur, t)
+    makers["murmur.murmur_batch[1000]"] = lambda: partial(murmur.murmur_batch, 1000)
+    makers["verse.haiku"] = lambda: import_module("verse").haiku
+    for lines in (5, 50, 500):
+        makers[f"verse.free_verse[{lines}]"] = lambda n=lines: partial(import_module("verse").free_verse, n)
+    makers["verse.concrete_poem"] = lambda: import_module("verse").concrete_poem
+    for style in ("function", "class", "import", "loop"):
+        makers[f"poem.generate_{style}_poem"] = lambda s=style: getattr(import_module("poem"), f"generate_{s}_poem")
+    makers["prompt.generate_prompt"] = lambda: import_module("prompt").generate_prompt
+    for analyzer in ("analyze_code", "analyze_code_regex"):
+        makers[f"code_poet.{analyzer}[small]"] = lambda a=analyzer: partial(
+            getattr(import_module("code_poet"), a), read_text(os.path.join(HERE, "murmur.py")))
+        makers[f"code_poet.{analyzer}[4MB]"] = lambda a=analyzer: partial(
+            getattr(import_module("code_poet"), a), large_source())
+    for poem in ("self_aware_haiku", "meta_poem", "recursive_verse", "generation_log_poem", "murmur_verse_hybrid"):
+        makers[f"self_verse.{poem}"] = lambda p=poem: getattr(import_module("self_verse"), p)
+
+    return {name: make() for name, make in makers.items() if not only or only in name}
+
+
+def measure(func, seconds: float = TARGET_SECONDS) -> dict:
+    """throughput over a calibrated loop, then percentiles of single calls"""
+    random.seed(0)
+    clock = time.perf_counter
+    # like timeit: a collection mid-loop is noise, not the code under test
+    gc.disable()
+    try:
+        return _measure(func, seconds, clock)
+    finally:
+        gc.enable()
+
+
+def _measure(func, seconds: float, clock) -> dict:
+    """the timing itself, with collection already off"""
+    # calibrate: double the loop until it takes a tenth of the budget
+    number = 1
+    while True:
+        start = clock()
+        for _ in range(number):
+            func()
+        elapsed = clock() - start
+        if elapsed >= seconds / 10:
+            break
+        number *= 2
+
+    best = elapsed / number
+    for _ in range(REPEATS):
+        start = clock()
+        for _ in range(number):
+            func()
+        best = min(best, (clock() - start) / number)
+
+    samples = []
+    for _ in range(min(LATENCY_SAMPLES, max(number * 4, 5))):
+        start = clock()
+        func()
+        samples.append(clock() - start)
+    samples.sort()
+
+    return {
+        "ops_per_sec": 1 / best,
+        "p50_us": samples[len(samples) // 2] * 1e6,
+        "p99_us": samples[min(len(samples) - 1, len(samples) * 99 // 100)] * 1e6,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float = THRESHOLD) -> list:
+    """names whose throughput fell more than threshold below the baseline"""
+    regressions = []
+    for name, now in results.items():
+        before = baseline.get("results", {}).get(name)
+        if before and now["ops_per_sec"] < before["ops_per_sec"] * (1 - threshold):
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    save = None
+    against = None
+    only = None
+    threshold = THRESHOLD
+    as_json = False
+
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--save":
+            if i + 1 < len(args) and not args[i + 1].startswith("--"):
+                save = args[i + 1]
+                i += 1
+            else:
+                save = BASELINE
+        elif arg == "--compare":
+            if i + 1 < len(args) and not args[i + 1].startswith("--"):
+                against = args[i + 1]
+                i += 1
+            else:
+                against = BASELINE
+        elif arg == "--filter" and i + 1 < len(args):
+            only = args[i + 1]
+            i += 1
+        elif arg == "--threshold" and i + 1 < len(args):
+            threshold = float(args[i + 1])
+            i += 1
+        elif arg == "--json":
+            as_json = True
+        else:
+            print("bench - throughput and latency of every generator")
+            print()
+            print("usage:")
+            print("  bench.py                    # run everything")
+            print("  bench.py --filter <text>    # only cases whose name contains text")
+            print("  bench.py --save [path]      # store results as the baseline")
+            print("  bench.py --compare [path]   # flag regressions, exit 1 on any")
+            print("  bench.py --threshold F      # regression cutoff (default 0.25)")
+            print("  bench.py --json             # results as JSON")
+            print()
+            print(f"baseline default: {os.path.basename(BASELINE)}")
+            return
+        i += 1
+
+    import json
+    import platform
+    from datetime import datetime
+
+    baseline = None
+    if against:
+        if not os.path.exists(against):
+            print(f"no baseline at {against}")
+            sys.exit(2)
+        baseline = json.loads(read_text(against))
+
+    results = {}
+    for name, func in cases(only).items():
+        results[name] = measure(func)
+        if not as_json:
+            r = results[name]
+            line = f"{name:<40} {r['ops_per_sec']:>12,.0f}/s  p50 {r['p50_us']:>10.1f}us  p99 {r['p99_us']:>10.1f}us"
+            before = baseline and baseline.get("results", {}).get(name)
+            if before:
+                change = r["ops_per_sec"] / before["ops_per_sec"] - 1
+                line += f"  {change:+.0%}"
+            print(line, flush=True)
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+
+    if as_json:
+        print(json.dumps(report, indent=2))
+
+    if save:
+        with open(save, "w") as f:
+            f.write(json.dumps(report, indent=2) + "\n")
+        print(f"baseline saved to {save}", file=sys.stderr)
+
+    if baseline:
+        regressions = compare(results, baseline, threshold)
+        if regressions:
+            print(f"regressions (>{threshold:.0%} slower): {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
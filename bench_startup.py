@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+bench_startup - how long before the first word
+
+times a cold start of every murmur subcommand,
+less the bare interpreter, and fails when any
+of them goes over its budget
+"""
+
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+DISPATCHER = HERE / "murmur"
+
+# subcommand -> argv that imports the module and exits quickly
+INVOCATIONS = {
+    "murmur": ["--count", "1", "--seed", "1"],
+    "verse": ["verse", "--seed", "1"],
+    "poem": ["poem", "--help"],
+    "code": ["code"],
+    "self": ["self", "--help"],
+    "chain": ["chain", "--help"],
+    "prompt": ["prompt", "--help"],
+    "serve": ["serve", "--help"],
+    "syllables": ["syllables", "--help"],
+    "bench": ["bench", "--help"],
+}
+
+# milliseconds over a bare `python -c pass`
+DEFAULT_BUDGET_MS = 30
+BUDGET_MS = {
+    # asyncio alone is most of this
+    "serve": 150,
+}
+
+RUNS = 15
+
+
+def best_of(argv: list, runs: int = RUNS) -> float:
+    """fastest wall time of argv over several runs, in milliseconds"""
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(argv, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    scale = 1.0
+    runs = RUNS
+
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--scale" and i + 1 < len(args):
+            # slower machines: allow budgets * scale
+            scale = float(args[i + 1])
+            i += 1
+        elif arg == "--runs" and i + 1 < len(args):
+            runs = max(int(args[i + 1]), 1)
+            i += 1
+        else:
+            print("bench_startup - cold start time of every subcommand")
+            print()
+            print("usage:")
+            print("  bench_startup.py             # measure, exit 1 over budget")
+            print("  bench_startup.py --scale X   # multiply every budget by X")
+            print("  bench_startup.py --runs N    # best of N runs (default 15)")
+            return
+        i += 1
+
+    baseline = best_of([sys.executable, "-c", "pass"], runs)
+    print(f"interpreter: {baseline:.1f}ms")
+
+    over = []
+    for name, argv in INVOCATIONS.items():
+        elapsed = best_of([sys.executable, str(DISPATCHER)] + argv, runs) - baseline
+        budget = BUDGET_MS.get(name, DEFAULT_BUDGET_MS) * scale
+        status = "ok" if elapsed <= budget else "OVER"
+        print(f"  {name:<9} {elapsed:6.1f}ms  (budget {budget:.0f}ms)  {status}")
+        if elapsed > budget:
+            over.append(name)
+
+    if over:
+        print(f"over budget: {', '.join(over)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -7,23 +7,281 @@ produces murmurs about iteration, progress, ideas
 the chain speaks through murmur
 """
 
-import json
+import os
 import random
+import struct
 import sys
-from pathlib import Path
 
-HOME = Path.home()
-STATE_FILE = HOME / ".infinite-chain" / "state.json"
+HOME = os.path.expanduser("~")
+STATE_FILE = os.path.join(HOME, ".infinite-chain", "state.json")
 
 
-def load_state() -> dict:
-    """load chain state"""
-    if not STATE_FILE.exists():
+# path -> ((mtime_ns, size), parsed state), for the life of the process
+_STATES = {}
+
+# path -> ((mtime_ns, size), summary), likewise
+_SUMMARIES = {}
+
+
+def _stat(path: str):
+    """(mtime_ns, size) of path, or None if it isn't there"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def load_state(path: str = None) -> dict:
+    """load chain state, parsing again only when the file has changed"""
+    import json
+
+    path = os.fspath(path or STATE_FILE)
+    stat = _stat(path)
+    if stat is None:
         return {}
+    cached = _STATES.get(path)
+    if cached and cached[0] == stat:
+        return cached[1]
     try:
-        return json.loads(STATE_FILE.read_text())
+        with open(path) as f:
+            state = json.load(f)
     except:
+        state = {}
+    _STATES[path] = (stat, state)
+    return state
+
+
+def summary_file(path: str = None) -> str:
+    """where the summary of a state file lives: state.json -> state.summary.json"""
+    base, extension = os.path.splitext(os.fspath(path or STATE_FILE))
+    return f"{base}.summary{extension}"
+
+
+def summarize(state: dict) -> dict:
+    """just what the murmurs read: the scalars, and counts for the lists"""
+    if not state:
+        return {}
+    return {
+        "iteration": state.get("iteration", 0),
+        "streak": {"iterations": state.get("streak", {}).get("iterations", 0)},
+        "ideas": len(state.get("ideas", [])),
+        "completed": len(state.get("completed", [])),
+    }
+
+
+# pieces of JSON, as bytes patterns for the summary scanner
+_STRING = rb'"[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*"'
+_LITERAL = rb'-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null'
+_WS = rb'[ \t\r\n]*'
+_SCALAR = rb'(?:' + _STRING + rb'|' + _LITERAL + rb')'
+_MEMBER = _WS + _STRING + _WS + rb':' + _WS + _SCALAR + _WS
+_ITEM = _WS + _SCALAR + _WS
+# a container with nothing nested inside it
+_FLAT = (
+    rb'\{(?:' + _MEMBER + rb'(?:,' + _MEMBER + rb')*|' + _WS + rb')\}'
+    rb'|\[(?:' + _ITEM + rb'(?:,' + _ITEM + rb')*|' + _WS + rb')\]'
+)
+_VALUE = _WS + rb'(?:' + _SCALAR + rb'|' + _FLAT + rb')' + _WS
+
+# array elements taken per regex match while counting
+RUN = 64
+
+_scanner = None
+
+
+def _patterns():
+    """the scanner's regexes, compiled on first use"""
+    global _scanner
+    if _scanner is None:
+        import re
+
+        _scanner = {
+            "value": re.compile(_VALUE),
+            "element": re.compile(_VALUE + rb'([,\]])'),
+            "run": re.compile(rb'(?:' + _VALUE + rb',){%d}' % RUN),
+            "key": re.compile(_WS + rb'(' + _STRING + rb')' + _WS + rb':'),
+            "nested": re.compile(_STRING + rb'|[{}\[\]]'),
+            "punct": re.compile(rb'[ \t\r\n]*([,}\]])'),
+            "open": re.compile(rb'[ \t\r\n]*([{\[])'),
+            "empty": re.compile(rb'[ \t\r\n]*\]'),
+            "end": re.compile(rb'[ \t\r\n]*\Z'),
+        }
+    return _scanner
+
+
+def _skip(buf, pos: int) -> int:
+    """the end of the JSON value starting at pos"""
+    p = _patterns()
+    m = p["value"].match(buf, pos)
+    if m:
+        return m.end()
+    m = p["open"].match(buf, pos)
+    if not m:
+        raise ValueError(f"no value at {pos}")
+    import json
+
+    start = m.start(1)
+    depth = 0
+    for m in p["nested"].finditer(buf, start):
+        token = m.group()
+        if token in (b"{", b"["):
+            depth += 1
+        elif token in (b"}", b"]"):
+            depth -= 1
+            if not depth:
+                # rare enough to check properly; one value is small
+                json.loads(buf[start:m.end()])
+                return m.end()
+    raise ValueError("unclosed container")
+
+
+def _count(buf, pos: int) -> tuple:
+    """(elements, end) of the JSON array starting at pos, none of them kept"""
+    p = _patterns()
+    m = p["open"].match(buf, pos)
+    if not m or m.group(1) != b"[":
+        raise ValueError(f"no array at {pos}")
+    pos = m.end()
+    empty = p["empty"].match(buf, pos)
+    if empty:
+        return 0, empty.end()
+    n = 0
+    run = p["run"].match
+    element = p["element"].match
+    while True:
+        m = run(buf, pos)
+        while m:
+            n += RUN
+            pos = m.end()
+            m = run(buf, pos)
+        m = element(buf, pos)
+        if m is None:
+            # something nested: walk it the slow way
+            pos = _skip(buf, pos)
+            m = p["punct"].match(buf, pos)
+            if m is None or m.group(1) == b"}":
+                raise ValueError(f"bad array at {pos}")
+        n += 1
+        pos = m.end()
+        if m.group(1) == b"]":
+            return n, pos
+
+
+def scan_summary(path: str = None) -> dict:
+    """
+    summarize() of a state file, read through mmap without parsing it
+
+    only the top level is walked: iteration and streak are decoded,
+    ideas and completed are counted element by element and kept
+    nowhere, so memory stays flat however long they grow. anything
+    that doesn't scan as JSON gets the full parse instead
+    """
+    import json
+    import mmap
+
+    path = path or STATE_FILE
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return _scan(buf, json)
+    except (OSError, ValueError):
+        return summarize(load_state(path))
+
+
+def _scan(buf, json) -> dict:
+    p = _patterns()
+    m = p["open"].match(buf, 0)
+    if not m or m.group(1) != b"{":
+        raise ValueError("state is not an object")
+    pos = m.end()
+    found = {}
+    m = p["punct"].match(buf, pos)
+    if m and m.group(1) == b"}":
+        pos = m.end()
+    else:
+        while True:
+            m = p["key"].match(buf, pos)
+            if m is None:
+                raise ValueError(f"no key at {pos}")
+            key = json.loads(m.group(1))
+            pos = m.end()
+            if key in ("ideas", "completed"):
+                found[key], pos = _count(buf, pos)
+            else:
+                end = _skip(buf, pos)
+                if key in ("iteration", "streak"):
+                    found[key] = json.loads(buf[pos:end])
+                else:
+                    found.setdefault(key, None)
+                pos = end
+            m = p["punct"].match(buf, pos)
+            if m is None or m.group(1) == b"]":
+                raise ValueError(f"bad object at {pos}")
+            pos = m.end()
+            if m.group(1) == b"}":
+                break
+    if not p["end"].match(buf, pos):
+        raise ValueError("trailing data")
+
+    if not found:
         return {}
+    streak = found.get("streak", {})
+    if not isinstance(streak, dict):
+        raise ValueError("streak is not an object")
+    return {
+        "iteration": found.get("iteration", 0),
+        "streak": {"iterations": streak.get("iterations", 0)},
+        "ideas": found.get("ideas", 0),
+        "completed": found.get("completed", 0),
+    }
+
+
+def load_summary(path: str = None) -> dict:
+    """
+    the summary of the chain state, without parsing the state if we can
+
+    the sidecar remembers the mtime and size it was made from;
+    while those match, the state file is never opened. within one
+    process, an unchanged stat is all it costs
+    """
+    import json
+
+    path = os.fspath(path or STATE_FILE)
+    stat = _stat(path)
+    if stat is None:
+        return {}
+    cached = _SUMMARIES.get(path)
+    if cached and cached[0] == stat:
+        return cached[1]
+
+    sidecar = summary_file(path)
+    try:
+        with open(sidecar) as f:
+            stored = json.load(f)
+        if (stored["mtime_ns"], stored["size"]) == stat:
+            _SUMMARIES[path] = (stat, stored["summary"])
+            return stored["summary"]
+    except:
+        pass
+
+    summary = scan_summary(path)
+    try:
+        fresh = f"{sidecar}.{os.getpid()}"
+        with open(fresh, "w") as f:
+            json.dump({"mtime_ns": stat[0], "size": stat[1], "summary": summary}, f)
+        os.replace(fresh, sidecar)
+    except OSError:
+        # a read-only chain can still be murmured about, just not summarized
+        pass
+    if summary:
+        record_observation(path, stat, summary)
+    _SUMMARIES[path] = (stat, summary)
+    return summary
+
+
+def tally(items) -> int:
+    """a list's length, or a count already taken by summarize()"""
+    return items if isinstance(items, int) else len(items)
 
 
 # murmur templates based on state
@@ -76,78 +334,560 @@ META_MURMURS = [
 ]
 
 
-def murmur_about_iteration(state: dict) -> str:
+def murmur_about_iteration(state: dict, rng=None) -> str:
     """generate murmur about iteration count"""
+    rng = rng or random
     n = state.get("iteration", 0)
-    template = random.choice(ITERATION_MURMURS)
+    template = rng.choice(ITERATION_MURMURS)
     return template.format(n=n)
 
 
-def murmur_about_streak(state: dict) -> str:
+def murmur_about_streak(state: dict, rng=None) -> str:
     """generate murmur about streak"""
+    rng = rng or random
     n = state.get("streak", {}).get("iterations", 0)
-    template = random.choice(STREAK_MURMURS)
+    template = rng.choice(STREAK_MURMURS)
     return template.format(n=n)
 
 
-def murmur_about_ideas(state: dict) -> str:
-    """generate murmur about ideas queue"""
-    ideas = state.get("ideas", [])
-    if not ideas:
-        return random.choice(EMPTY_MURMURS)
+def murmur_about_ideas(state: dict, rng=None) -> str:
+    """generate murmur about ideas queue (a state, or its summary)"""
+    rng = rng or random
+    n = tally(state.get("ideas", []))
+    if not n:
+        return rng.choice(EMPTY_MURMURS)
 
-    template = random.choice(IDEAS_MURMURS)
-    return template.format(n=len(ideas))
+    template = rng.choice(IDEAS_MURMURS)
+    return template.format(n=n)
 
 
-def murmur_about_progress(state: dict) -> str:
-    """generate murmur about completed tasks"""
-    n = len(state.get("completed", []))
-    template = random.choice(PROGRESS_MURMURS)
+def murmur_about_progress(state: dict, rng=None) -> str:
+    """generate murmur about completed tasks (a state, or its summary)"""
+    rng = rng or random
+    n = tally(state.get("completed", []))
+    template = rng.choice(PROGRESS_MURMURS)
     return template.format(n=n)
 
 
-def chain_murmur(count: int = 1) -> list[str]:
+GENERATORS = [
+    murmur_about_iteration,
+    murmur_about_streak,
+    murmur_about_ideas,
+    murmur_about_progress,
+    lambda s, rng: rng.choice(META_MURMURS),
+]
+
+
+SILENT_MURMURS = [
+    "the chain is silent",
+    "no state to read",
+    "nothing written yet",
+    "the chain has not begun",
+]
+
+
+def chain_murmur(count: int = 1, rng=None) -> list[str]:
     """generate murmurs about chain state"""
-    state = load_state()
+    rng = rng or random
+    state = load_summary()
 
     if not state:
-        return ["the chain is silent", "no state to read"]
-
-    generators = [
-        murmur_about_iteration,
-        murmur_about_streak,
-        murmur_about_ideas,
-        murmur_about_progress,
-        lambda s: random.choice(META_MURMURS),
-    ]
+        # every silent line once before any comes round again
+        silent = rng.sample(SILENT_MURMURS, len(SILENT_MURMURS))
+        return [silent[i % len(silent)] for i in range(count)]
 
     murmurs = []
     for _ in range(count):
-        gen = random.choice(generators)
-        murmurs.append(gen(state))
+        gen = rng.choice(GENERATORS)
+        murmurs.append(gen(state, rng))
 
     return murmurs
 
 
-def full_status_murmur() -> str:
+def full_status_murmur(rng=None, state: dict = None) -> str:
     """generate a complete murmur about chain status"""
-    state = load_state()
+    rng = rng or random
+    if state is None:
+        state = load_summary()
 
     if not state:
         return "the chain is silent"
 
     lines = [
-        murmur_about_iteration(state),
-        murmur_about_streak(state),
-        murmur_about_ideas(state),
-        murmur_about_progress(state),
-        random.choice(META_MURMURS),
+        murmur_about_iteration(state, rng),
+        murmur_about_streak(state, rng),
+        murmur_about_ideas(state, rng),
+        murmur_about_progress(state, rng),
+        rng.choice(META_MURMURS),
     ]
 
     return "\n".join(lines)
 
 
+# threads loading a fleet's state files at once
+FLEET_THREADS = 16
+
+FLEET_MURMURS = [
+    "{chains} chains, {iteration} iterations between them",
+    "the fleet has turned {iteration} times",
+    "{chains} wheels, {iteration} turns",
+]
+
+LONGEST_MURMURS = [
+    "longest unbroken: {name}, at {n}",
+    "{name} holds the streak: {n}",
+    "{n} without pause, and that is {name}",
+]
+
+BACKLOG_MURMURS = [
+    "{n} ideas waiting across the fleet",
+    "fleet queue depth: {n}",
+    "{n} threads to pull, between all of us",
+]
+
+FLEET_PROGRESS_MURMURS = [
+    "{n} tasks behind the fleet",
+    "together: {n} things done",
+]
+
+
+def find_states(spec) -> list:
+    """
+    the state files a spec names: a directory, or a glob
+
+    in a directory, both <dir>/*.json and <dir>/*/state.json count;
+    summary sidecars never do
+    """
+    import glob
+
+    spec = os.path.expanduser(str(spec))
+    if os.path.isdir(spec):
+        found = glob.glob(os.path.join(spec, "*.json")) + glob.glob(os.path.join(spec, "*", "state.json"))
+    else:
+        found = glob.glob(spec, recursive=True)
+    return sorted(p for p in set(found) if not p.endswith(".summary.json") and os.path.isfile(p))
+
+
+def chain_name(path: str) -> str:
+    """what to call a chain: its directory for a state.json, else the file's stem"""
+    path = os.fspath(path)
+    if os.path.basename(path) == "state.json":
+        parent = os.path.dirname(path)
+        return os.path.basename(parent).lstrip(".") or parent
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _chain_stem(path: str) -> str:
+    """the path a chain goes by: its directory for a state.json, else the file less .json"""
+    if os.path.basename(path) == "state.json":
+        return os.path.dirname(path)
+    return os.path.splitext(path)[0]
+
+
+def chain_names(paths: list) -> dict:
+    """
+    path -> what to call each chain, unique within the fleet
+
+    a lone chain is just its chain_name; several are named from the
+    directory they all share, and any two that would still read the
+    same (foo.json beside foo/state.json) keep their file names
+    """
+    paths = [os.path.abspath(os.fspath(p)) for p in paths]
+    if len(paths) < 2:
+        return {path: chain_name(path) for path in paths}
+    root = os.path.commonpath([os.path.dirname(_chain_stem(p)) for p in paths])
+    names = {path: os.path.relpath(_chain_stem(path), root) for path in paths}
+    taken = {}
+    for name in names.values():
+        taken[name] = taken.get(name, 0) + 1
+    return {path: name if taken[name] == 1 else os.path.relpath(path, root) for path, name in names.items()}
+
+
+def load_fleet(paths: list, threads: int = FLEET_THREADS) -> dict:
+    """path -> summary for every state file, loaded side by side"""
+    paths = [os.path.abspath(os.fspath(p)) for p in paths]
+    if len(paths) > 1 and threads > 1:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(min(threads, len(paths))) as pool:
+            summaries = list(pool.map(load_summary, paths))
+    else:
+        summaries = [load_summary(path) for path in paths]
+    return dict(zip(paths, summaries))
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _number(value):
+    """value if it can be added up, else 0 - a chain may write anything"""
+    return value if _is_number(value) else 0
+
+
+def fleet_summary(fleet: dict, names: dict = None) -> dict:
+    """the fleet added up: iterations, backlog and progress summed, the longest streak"""
+    names = names or chain_names(list(fleet))
+    live = {path: s for path, s in fleet.items() if s}
+    longest = max(live, key=lambda path: _number(live[path]["streak"]["iterations"]), default=None)
+    return {
+        "chains": len(live),
+        "silent": len(fleet) - len(live),
+        "iteration": sum(_number(s["iteration"]) for s in live.values()),
+        "ideas": sum(s["ideas"] for s in live.values()),
+        "completed": sum(s["completed"] for s in live.values()),
+        "longest": names[longest] if longest else None,
+        "longest_streak": _number(live[longest]["streak"]["iterations"]) if longest else 0,
+    }
+
+
+def fleet_murmur(spec, rng=None) -> list[str]:
+    """a murmur from every chain a spec names, then a few about all of them"""
+    rng = rng or random
+    fleet = load_fleet(find_states(spec))
+    if not fleet:
+        return ["no chains here", "the fleet is silent"]
+
+    names = chain_names(list(fleet))
+    width = max(len(name) for name in names.values())
+    murmurs = []
+    for path, summary in fleet.items():
+        said = rng.choice(GENERATORS)(summary, rng) if summary else "the chain is silent"
+        murmurs.append(f"{names[path]:<{width}}  {said}")
+
+    total = fleet_summary(fleet, names)
+    if total["chains"]:
+        murmurs.append("")
+        murmurs.append(rng.choice(FLEET_MURMURS).format(**total))
+        murmurs.append(rng.choice(LONGEST_MURMURS).format(name=total["longest"], n=total["longest_streak"]))
+        if total["ideas"]:
+            murmurs.append(rng.choice(BACKLOG_MURMURS).format(n=total["ideas"]))
+        else:
+            murmurs.append(rng.choice(EMPTY_MURMURS))
+        murmurs.append(rng.choice(FLEET_PROGRESS_MURMURS).format(n=total["completed"]))
+    if total["silent"]:
+        murmurs.append(f"{total['silent']} silent")
+    return murmurs
+
+
+# observations a history file holds before the oldest are overwritten
+HISTORY_CAPACITY = 8192
+
+# magic, version, capacity, observations ever written
+HISTORY_HEADER = struct.Struct("<8sIIQ")
+# when (unix seconds), iteration, streak, ideas, completed
+HISTORY_RECORD = struct.Struct("<dqqqq")
+# what a record's int64 fields can hold
+HISTORY_MIN, HISTORY_MAX = -2 ** 63, 2 ** 63 - 1
+HISTORY_MAGIC = b"chainhst"
+HISTORY_VERSION = 1
+
+# the window trends are read over, in hours
+TREND_HOURS = 24
+
+
+def history_file(path: str = None) -> str:
+    """where a state file's history lives: state.json -> state.history"""
+    return f"{os.path.splitext(os.fspath(path or STATE_FILE))[0]}.history"
+
+
+class History:
+    """
+    a ring of fixed-width observations, memory-mapped
+
+    the header counts every observation ever written, so the newest
+    is always at (written - 1) % capacity and any record - the one
+    an hour back included - is a little arithmetic away
+    """
+
+    def __init__(self, path: str, capacity: int = HISTORY_CAPACITY, write: bool = False):
+        import mmap
+
+        size = HISTORY_HEADER.size + capacity * HISTORY_RECORD.size
+        self.file = open(path, "r+b" if write and os.path.exists(path) else "w+b" if write else "rb")
+        try:
+            header = self.file.read(HISTORY_HEADER.size)
+            if len(header) == HISTORY_HEADER.size:
+                magic, version, stored, _ = HISTORY_HEADER.unpack(header)
+                if magic != HISTORY_MAGIC or version != HISTORY_VERSION or stored <= 0:
+                    raise ValueError(f"{path} is not a chain history")
+                whole = HISTORY_HEADER.size + stored * HISTORY_RECORD.size
+                if os.fstat(self.file.fileno()).st_size >= whole:
+                    capacity = stored
+                elif write:
+                    # cut short (a partial copy, a crash): its records can't be trusted
+                    self._start(size, capacity)
+                else:
+                    raise ValueError(f"{path} is cut short")
+            elif write:
+                self._start(size, capacity)
+            else:
+                raise ValueError(f"{path} is not a chain history")
+            self.capacity = capacity
+            access = mmap.ACCESS_WRITE if write else mmap.ACCESS_READ
+            self.map = mmap.mmap(self.file.fileno(), 0, access=access)
+        except Exception:
+            self.file.close()
+            raise
+
+    def _start(self, size: int, capacity: int):
+        """an empty ring: the file sized for capacity, nothing written"""
+        self.file.truncate(size)
+        self.file.seek(0)
+        self.file.write(HISTORY_HEADER.pack(HISTORY_MAGIC, HISTORY_VERSION, capacity, 0))
+        self.file.flush()
+
+    @property
+    def written(self) -> int:
+        return HISTORY_HEADER.unpack_from(self.map, 0)[3]
+
+    def __len__(self) -> int:
+        return min(self.written, self.capacity)
+
+    def __getitem__(self, i: int) -> tuple:
+        """observation i, oldest first; negative counts back from the newest"""
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        slot = (self.written - n + i) % self.capacity
+        return HISTORY_RECORD.unpack_from(self.map, HISTORY_HEADER.size + slot * HISTORY_RECORD.size)
+
+    def append(self, when: float, summary: dict):
+        written = self.written
+        slot = written % self.capacity
+        HISTORY_RECORD.pack_into(
+            self.map, HISTORY_HEADER.size + slot * HISTORY_RECORD.size,
+            when, summary["iteration"], summary["streak"]["iterations"], summary["ideas"], summary["completed"],
+        )
+        # the count goes last: a reader never sees a half-written record
+        HISTORY_HEADER.pack_into(self.map, 0, HISTORY_MAGIC, HISTORY_VERSION, self.capacity, written + 1)
+
+    def since(self, when: float) -> int:
+        """index of the oldest observation at or after when (binary search)"""
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self[mid][0] < when:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+
+def record_observation(path: str, stat: tuple, summary: dict):
+    """append a changed summary to its history, stamped with the state's mtime"""
+    when = stat[0] / 1e9
+    fields = (summary["iteration"], summary["streak"]["iterations"], summary["ideas"], summary["completed"])
+    if not all(type(n) is int and HISTORY_MIN <= n <= HISTORY_MAX for n in fields):
+        # a state the murmurs can read but a record can't hold: leave it out
+        return
+    try:
+        history = History(history_file(path), write=True)
+    except (OSError, ValueError, struct.error):
+        return
+    try:
+        try:
+            import fcntl
+
+            fcntl.flock(history.file, fcntl.LOCK_EX)
+        except ImportError:
+            pass
+        if not len(history) or (history[-1][0] < when and history[-1][1:] != fields):
+            history.append(when, summary)
+    except (OSError, struct.error):
+        # a history that can't take the record is no history
+        pass
+    finally:
+        history.close()
+
+
+def trend(path: str = None, hours: float = TREND_HOURS) -> dict:
+    """
+    rates over the last hours of history, from just two records
+
+    the newest observation against the oldest one inside the window;
+    empty if there aren't two to compare
+    """
+    try:
+        history = History(history_file(path or STATE_FILE))
+    except (OSError, ValueError, struct.error):
+        return {}
+    try:
+        if len(history) < 2:
+            return {}
+        newest = history[-1]
+        oldest = history[min(history.since(newest[0] - hours * 3600), len(history) - 2)]
+        elapsed = (newest[0] - oldest[0]) / 3600
+        if elapsed <= 0:
+            return {}
+        return {
+            "hours": elapsed,
+            "observations": len(history) - history.since(oldest[0]),
+            "iterations_per_hour": (newest[1] - oldest[1]) / elapsed,
+            "completed_per_hour": (newest[4] - oldest[4]) / elapsed,
+            "backlog_change": newest[3] - oldest[3],
+            "streak": newest[2],
+        }
+    except struct.error:
+        return {}
+    finally:
+        history.close()
+
+
+RATE_MURMURS = [
+    "{rate:.1f} iterations per hour",
+    "turning at {rate:.1f} an hour",
+    "the wheel: {rate:.1f} per hour",
+]
+
+DONE_RATE_MURMURS = [
+    "{rate:.1f} tasks done per hour",
+    "finishing {rate:.1f} an hour",
+]
+
+SHRINKING_MURMURS = [
+    "backlog shrinking, {n} fewer",
+    "the queue drains by {n}",
+]
+
+GROWING_MURMURS = [
+    "backlog growing, {n} more",
+    "the queue fills by {n}",
+]
+
+STEADY_MURMURS = [
+    "backlog steady",
+    "the queue holds its level",
+]
+
+STILL_MURMURS = [
+    "no history yet",
+    "too soon to say how fast",
+]
+
+
+def trend_murmur(path: str = None, hours: float = TREND_HOURS, rng=None) -> list[str]:
+    """murmurs about velocity: rates per hour and which way the backlog moves"""
+    rng = rng or random
+    rates = trend(path, hours)
+    if not rates:
+        return [rng.choice(STILL_MURMURS)]
+
+    change = rates["backlog_change"]
+    if change < 0:
+        backlog = rng.choice(SHRINKING_MURMURS).format(n=-change)
+    elif change > 0:
+        backlog = rng.choice(GROWING_MURMURS).format(n=change)
+    else:
+        backlog = rng.choice(STEADY_MURMURS)
+    return [
+        rng.choice(RATE_MURMURS).format(rate=rates["iterations_per_hour"]),
+        rng.choice(DONE_RATE_MURMURS).format(rate=rates["completed_per_hour"]),
+        backlog,
+        f"over the last {rates['hours']:.1f} hours",
+    ]
+
+
+# a burst of writes to the state file settles within this long
+DAEMON_DEBOUNCE = 0.02
+
+# seconds between stats of the state file when there is no inotify
+DAEMON_POLL = 0.025
+
+STREAK_BROKEN_MURMURS = [
+    "the streak breaks",
+    "unbroken no longer",
+    "back to {n}",
+]
+
+
+def moved(before: dict, after: dict, rng=None) -> list[str]:
+    """murmurs for just the tracked fields that changed between two summaries"""
+    rng = rng or random
+    if not after:
+        return ["the chain is silent"] if before else []
+    if not before:
+        return full_status_murmur(rng, after).split("\n")
+
+    murmurs = []
+    if after["iteration"] != before["iteration"]:
+        murmurs.append(murmur_about_iteration(after, rng))
+    streak, was = after["streak"]["iterations"], before["streak"]["iterations"]
+    if streak != was and _is_number(streak) and _is_number(was):
+        # only numbers have an order; a chain may write anything
+        if streak < was:
+            murmurs.append(rng.choice(STREAK_BROKEN_MURMURS).format(n=streak))
+        else:
+            murmurs.append(murmur_about_streak(after, rng))
+    if after["ideas"] != before["ideas"]:
+        murmurs.append(murmur_about_ideas(after, rng))
+    if after["completed"] != before["completed"]:
+        murmurs.append(murmur_about_progress(after, rng))
+    return murmurs
+
+
+def daemon(path: str = None, out: str = None, poll: bool = False):
+    """
+    watch the state file and murmur when what it tracks moves
+
+    the file is looked at only when the kernel (or a stat) says it
+    changed, and summarized through the mtime cache and the scanner.
+    out may name a FIFO: it is opened when the first murmur is ready
+    and again whenever its reader goes away
+    """
+    from watch import Watcher
+
+    path = os.fspath(path or STATE_FILE)
+    if not os.path.isdir(os.path.dirname(os.path.abspath(path))):
+        print(f"no such directory: {os.path.dirname(path)}", file=sys.stderr)
+        sys.exit(1)
+    watcher = Watcher(path, debounce=DAEMON_DEBOUNCE, interval=DAEMON_POLL, poll=poll)
+    print(f"watching {path} ({watcher.backend})", file=sys.stderr, flush=True)
+    sink = None
+
+    def emit(lines: list):
+        nonlocal sink
+        if not lines:
+            return
+        text = "\n".join(lines) + "\n"
+        if out is None:
+            sys.stdout.write(text)
+            sys.stdout.flush()
+            return
+        while True:
+            if sink is None:
+                sink = open(out, "w")
+            try:
+                sink.write(text)
+                sink.flush()
+                return
+            except BrokenPipeError:
+                # the reader left; wait for the next one
+                try:
+                    sink.close()
+                except BrokenPipeError:
+                    pass
+                sink = None
+
+    try:
+        last = load_summary(path)
+        emit(moved({}, last))
+        for _ in watcher:
+            now = load_summary(path)
+            emit(moved(last, now))
+            last = now
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
 def main():
     if len(sys.argv) < 2:
         for m in chain_murmur(3):
@@ -156,7 +896,31 @@ def main():
 
     cmd = sys.argv[1]
 
-    if cmd == "--full":
+    if cmd == "--fleet" and len(sys.argv) > 2:
+        import time
+
+        every = float(sys.argv[4]) if len(sys.argv) > 4 and sys.argv[3] == "--every" else None
+        while True:
+            for m in fleet_murmur(sys.argv[2]):
+                print(m)
+            if every is None:
+                return
+            print(flush=True)
+            time.sleep(every)
+
+    elif cmd == "--daemon":
+        args = sys.argv[2:]
+        out = args[args.index("--to") + 1] if "--to" in args[:-1] else None
+        state = args[args.index("--state") + 1] if "--state" in args[:-1] else None
+        daemon(state, out, "--poll" in args)
+
+    elif cmd == "--trend":
+        hours = float(sys.argv[2]) if len(sys.argv) > 2 else TREND_HOURS
+        load_summary()
+        for m in trend_murmur(hours=hours):
+            print(m)
+
+    elif cmd == "--full":
         print(full_status_murmur())
 
     elif cmd == "--count":
@@ -165,15 +929,15 @@ def main():
             print(m)
 
     elif cmd == "--iteration":
-        state = load_state()
+        state = load_summary()
         print(murmur_about_iteration(state))
 
     elif cmd == "--streak":
-        state = load_state()
+        state = load_summary()
         print(murmur_about_streak(state))
 
     elif cmd == "--ideas":
-        state = load_state()
+        state = load_summary()
         print(murmur_about_ideas(state))
 
     else:
@@ -186,6 +950,11 @@ def main():
         print("  chain_murmur.py --iteration  # about iteration")
         print("  chain_murmur.py --streak     # about streak")
         print("  chain_murmur.py --ideas      # about ideas")
+        print("  chain_murmur.py --daemon     # murmur whenever the state moves")
+        print("      [--to FIFO] [--state FILE] [--poll]")
+        print("  chain_murmur.py --trend [H]  # rates over the last H hours (default 24)")
+        print("  chain_murmur.py --fleet <dir|glob>            # every chain, then all of them")
+        print("  chain_murmur.py --fleet <dir|glob> --every S  # again every S seconds")
 
 
 if __name__ == "__main__":
@@ -7,10 +7,12 @@ it will read the code
 and write a poem about what it sees
 """
 
-import re
+import os
 import sys
 import random
-from pathlib import Path
+import time
+
+from workers import pop_options
 
 
 # poetic vocabulary for code concepts
@@ -106,8 +108,201 @@ META = [
 ]
 
 
+# one pass over the source: comments and strings are consumed whole,
+# so nothing inside them is mistaken for code. every branch opens on a
+# literal character, which lets the regex engine skip ahead quickly
+TOKEN_PATTERN = r'''
+    (\#[^\n]*)
+  | ("""[^"\\]*(?:(?:\\[\s\S]|"(?!""))[^"\\]*)*"""
+    |\'\'\'[^'\\]*(?:(?:\\[\s\S]|'(?!''))[^'\\]*)*\'\'\')
+  | ("[^"\\\n]*(?:\\[\s\S][^"\\\n]*)*"
+    |'[^'\\\n]*(?:\\[\s\S][^'\\\n]*)*')
+  | d(?<=^d)ef\ (\w+)
+  | c(?<=^c)lass\ (\w+)
+  | (?:i(?<=^i)mport|f(?<=^f)rom)\b()
+  | (?:f(?<=\bf)or|w(?<=\bw)hile)\b()
+  | i(?<=\bi)f\b()
+  | r(?<=\br)eturn\b()
+'''
+
+# group numbers in TOKEN_PATTERN
+COMMENT, LONG_STRING, STRING, DEF, CLASS, IMPORT, LOOP, IF, RETURN = range(1, 10)
+
+_tokens = None
+
+
+def _token_regex():
+    """TOKEN_PATTERN, compiled on first use"""
+    global _tokens
+    if _tokens is None:
+        import re
+
+        _tokens = re.compile(TOKEN_PATTERN, re.VERBOSE | re.MULTILINE)
+    return _tokens
+
+
 def analyze_code(source: str) -> dict:
-    """extract features from code for poeticizing"""
+    """extract features from code for poeticizing, in a single pass"""
+    counts = [0] * 10
+    function_names = []
+    class_names = []
+    docstrings = 0
+
+    for m in _token_regex().finditer(source):
+        kind = m.lastindex
+        counts[kind] += 1
+        if kind == DEF:
+            function_names.append(m.group(DEF))
+        elif kind == CLASS:
+            class_names.append(m.group(CLASS))
+        elif kind == LONG_STRING:
+            # a docstring stands alone on its line, give or take a prefix
+            start = m.start()
+            line = source[source.rfind("\n", 0, start) + 1:start]
+            if not line.strip(" \trRuU"):
+                docstrings += 1
+
+    return {
+        "functions": counts[DEF],
+        "classes": counts[CLASS],
+        "loops": counts[LOOP],
+        "conditionals": counts[IF],
+        "returns": counts[RETURN],
+        "imports": counts[IMPORT],
+        "comments": counts[COMMENT],
+        "docstrings": docstrings,
+        "strings": counts[STRING] + counts[LONG_STRING] - docstrings,
+        "lines": source.strip().count("\n") + 1,
+        "characters": len(source),
+        "function_names": function_names,
+        "class_names": class_names,
+    }
+
+
+# characters read per step when streaming a file
+STREAM_CHUNK = 1 << 20
+
+# files bigger than this (in bytes) are analyzed streaming, not read whole
+STREAM_THRESHOLD = 16 << 20
+
+
+def analyze_stream(path, chunk_size: int = STREAM_CHUNK) -> dict:
+    """
+    analyze_code for files too big to hold, a chunk at a time
+
+    chunks are cut at line ends (never after a backslash), so ^ and \\b
+    mean what they do in the whole file. a triple-quoted string still
+    open at a cut is carried, with its line, until it closes. only
+    counts and the first few names are kept, so memory stays flat
+    however large the file - short of one enormous string
+    """
+    tokens = _token_regex()
+    counts = [0] * 10
+    function_names = []
+    class_names = []
+    docstrings = 0
+    characters = newlines = leading = trailing = 0
+    seen = False
+
+    def scan(segment: str, pos: int, final: bool) -> int:
+        """count tokens in segment from pos; where an open string starts, or its end"""
+        nonlocal docstrings
+        for m in tokens.finditer(segment, pos):
+            kind = m.lastindex
+            if kind == STRING and not final and m.end() - m.start() == 2:
+                # "" followed by a third quote: a long string yet to close
+                if segment[m.end():m.end() + 1] == segment[m.start()]:
+                    return m.start()
+            counts[kind] += 1
+            if kind == DEF:
+                if len(function_names) < NAMES_KEPT:
+                    function_names.append(m.group(DEF))
+            elif kind == CLASS:
+                if len(class_names) < NAMES_KEPT:
+                    class_names.append(m.group(CLASS))
+            elif kind == LONG_STRING:
+                start = m.start()
+                line = segment[segment.rfind("\n", 0, start) + 1:start]
+                if not line.strip(" \trRuU"):
+                    docstrings += 1
+        return len(segment)
+
+    with open(path, encoding="utf-8", errors="replace") as f:
+        carry = ""
+        pos = 0
+        closer = None
+        while True:
+            chunk = f.read(chunk_size)
+            final = not chunk
+            seam = len(carry)
+            carry += chunk
+
+            if closer is not None and not final:
+                # inside a long string: no rescan until it could have closed
+                if closer not in carry[max(seam - 2, 0):]:
+                    continue
+                closer = None
+
+            if final:
+                cut = len(carry)
+            else:
+                cut = carry.rfind("\n") + 1
+                while cut > 1 and carry[cut - 2] == "\\":
+                    cut = carry.rfind("\n", 0, cut - 1) + 1
+                if cut <= pos:
+                    continue
+            segment = carry[:cut]
+
+            done = scan(segment, pos, final)
+            if done < len(segment):
+                # keep the open string's whole line for the next scan
+                commit = segment.rfind("\n", 0, done) + 1
+                closer = segment[done] * 3
+                if closer in carry[done + 3:]:
+                    closer = None
+                pos = done - commit
+                segment = segment[:commit]
+            else:
+                pos = 0
+
+            # lines as source.strip().count("\n") + 1 would count them
+            characters += len(segment)
+            newlines += segment.count("\n")
+            if not seen:
+                content = len(segment) - len(segment.lstrip())
+                seen = content < len(segment)
+                leading += segment.count("\n", 0, content)
+            end = len(segment.rstrip())
+            if seen and end:
+                trailing = segment.count("\n", end)
+            else:
+                trailing += segment.count("\n")
+
+            carry = carry[len(segment):]
+            if final:
+                break
+
+    return {
+        "functions": counts[DEF],
+        "classes": counts[CLASS],
+        "loops": counts[LOOP],
+        "conditionals": counts[IF],
+        "returns": counts[RETURN],
+        "imports": counts[IMPORT],
+        "comments": counts[COMMENT],
+        "docstrings": docstrings,
+        "strings": counts[STRING] + counts[LONG_STRING] - docstrings,
+        "lines": newlines - leading - trailing + 1 if seen else 1,
+        "characters": characters,
+        "function_names": function_names,
+        "class_names": class_names,
+    }
+
+
+def analyze_code_regex(source: str) -> dict:
+    """the old analyzer, a regex scan per feature - kept to benchmark against"""
+    import re
+
     features = {
         "functions": len(re.findall(r'^def \w+', source, re.MULTILINE)),
         "classes": len(re.findall(r'^class \w+', source, re.MULTILINE)),
@@ -133,25 +328,50 @@ def analyze_code(source: str) -> dict:
 
 def poeticize_name(name: str) -> str:
     """turn a code name into poetic language"""
+    import re
+
     # split camelCase and snake_case
     words = re.sub(r'([a-z])([A-Z])', r'\1 \2', name)
     words = words.replace('_', ' ').lower()
     return words
 
 
-def generate_poem(filepath: Path) -> str:
-    """generate a poem about a python file"""
-    source = filepath.read_text()
-    features = analyze_code(source)
+# features that add up across files
+COUNTED = [
+    "functions", "classes", "loops", "conditionals", "returns", "imports",
+    "comments", "docstrings", "strings", "lines", "characters",
+]
+
+# names carried into an aggregate, enough for any stanza
+NAMES_KEPT = 8
+
+
+def add_features(total: dict, features: dict) -> dict:
+    """fold one file's features into a running total"""
+    for key in COUNTED:
+        total[key] = total.get(key, 0) + features[key]
+    total["files"] = total.get("files", 0) + 1
+    for key in ("function_names", "class_names"):
+        kept = total.setdefault(key, [])
+        kept.extend(features[key][:NAMES_KEPT - len(kept)])
+    return total
+
+
+def poem_from_features(name: str, features: dict, rng=None) -> str:
+    """a poem from already-extracted features (a file's, or a tree's total)"""
+    rng = rng or random
     lines = []
 
     # title
-    lines.append(f"poem for {filepath.name}")
+    lines.append(f"poem for {name}")
     lines.append("=" * (len(lines[0])))
     lines.append("")
 
     # opening stanza - about the file itself
-    lines.append(f"a file of {features['lines']} lines")
+    if "files" in features:
+        lines.append(f"{features['files']} files, {features['lines']} lines")
+    else:
+        lines.append(f"a file of {features['lines']} lines")
     lines.append(f"{features['characters']} characters of intent")
     lines.append("")
 
@@ -160,7 +380,7 @@ def generate_poem(filepath: Path) -> str:
         lines.append(f"{features['functions']} functions defined:")
         for name in features["function_names"][:3]:
             poetic_name = poeticize_name(name)
-            lines.append(f"  {random.choice(VOCAB['function'])}")
+            lines.append(f"  {rng.choice(VOCAB['function'])}")
             lines.append(f"  named '{poetic_name}'")
         if features["functions"] > 3:
             lines.append(f"  and {features['functions'] - 3} more...")
@@ -171,7 +391,7 @@ def generate_poem(filepath: Path) -> str:
         lines.append(f"{features['classes']} classes emerge:")
         for name in features["class_names"][:2]:
             poetic_name = poeticize_name(name)
-            lines.append(f"  {random.choice(VOCAB['class'])}")
+            lines.append(f"  {rng.choice(VOCAB['class'])}")
             lines.append(f"  called {poetic_name}")
         lines.append("")
 
@@ -179,40 +399,49 @@ def generate_poem(filepath: Path) -> str:
     if features["loops"] > 0 or features["conditionals"] > 0:
         lines.append("the flow of logic:")
         if features["loops"] > 0:
-            lines.append(f"  {features['loops']} loops - {random.choice(VOCAB['loop'])}")
+            lines.append(f"  {features['loops']} loops - {rng.choice(VOCAB['loop'])}")
         if features["conditionals"] > 0:
-            lines.append(f"  {features['conditionals']} conditions - {random.choice(VOCAB['conditional'])}")
+            lines.append(f"  {features['conditionals']} conditions - {rng.choice(VOCAB['conditional'])}")
         lines.append("")
 
     # dependencies stanza
     if features["imports"] > 0:
         lines.append(f"{features['imports']} imports:")
-        lines.append(f"  {random.choice(VOCAB['import'])}")
+        lines.append(f"  {rng.choice(VOCAB['import'])}")
         lines.append("")
 
     # voice stanza (comments/docstrings)
     voice_count = features["comments"] + features["docstrings"]
     if voice_count > 0:
-        lines.append(f"{voice_count} moments where {random.choice(VOCAB['comment'])}")
+        lines.append(f"{voice_count} moments where {rng.choice(VOCAB['comment'])}")
         lines.append("")
 
     # closing
-    lines.append(random.choice(STRUCTURAL))
-    lines.append(random.choice(META))
+    lines.append(rng.choice(STRUCTURAL))
+    lines.append(rng.choice(META))
 
     return "\n".join(lines)
 
 
-def generate_haiku(filepath: Path) -> str:
-    """generate a haiku about a python file"""
-    source = filepath.read_text()
-    features = analyze_code(source)
+def file_stem(path) -> str:
+    """a file's name without its extension"""
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def generate_poem(filepath: str, rng=None) -> str:
+    """generate a poem about a python file"""
+    return poem_from_features(os.path.basename(filepath), analyze_path(filepath), rng)
+
+
+def haiku_from_features(stem: str, features: dict, rng=None) -> str:
+    """a haiku from already-extracted features"""
+    rng = rng or random
 
     # construct haiku based on features
     line1_options = [
         f"{features['functions']} functions wait",
         f"code of {features['lines']} lines",
-        f"in {filepath.stem}'s depths",
+        f"in {stem}'s depths",
         "logic encoded",
         "instructions rest here",
     ]
@@ -233,31 +462,919 @@ def generate_haiku(filepath: Path) -> str:
         "electrons will flow",
     ]
 
-    return f"{random.choice(line1_options)}\n{random.choice(line2_options)}\n{random.choice(line3_options)}"
+    return f"{rng.choice(line1_options)}\n{rng.choice(line2_options)}\n{rng.choice(line3_options)}"
+
+
+def generate_haiku(filepath: str, rng=None) -> str:
+    """generate a haiku about a python file"""
+    return haiku_from_features(file_stem(filepath), analyze_path(filepath), rng)
+
+
+# files handed to a worker at a time
+BATCH_SIZE = 32
+
+# bump whenever analyze_code's output changes, to drop stale cache entries
+ANALYZER_VERSION = 1
+
+# cached feature JSON kept on disk before least-recently-used entries go
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+# seconds to wait on another run's write before giving up on the cache
+CACHE_TIMEOUT = 10.0
+
+# what a worker reports when a file's content matches its cached digest
+UNCHANGED = "unchanged"
+
+
+def content_digest(data: bytes) -> str:
+    """a short, fast hash of a file's bytes"""
+    import hashlib
+
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def decode_source(data: bytes) -> str:
+    """bytes to text the way a text-mode open() would, undecodable bytes replaced"""
+    text = data.decode("utf-8", errors="replace")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+    return text
+
+
+def analyze_path(path) -> dict:
+    """read one file and extract its features"""
+    if os.path.getsize(path) > STREAM_THRESHOLD:
+        return analyze_stream(path)
+    with open(path, "rb") as f:
+        return analyze_code(decode_source(f.read()))
+
+
+def file_digest(path) -> str:
+    """content_digest of a file, without holding it"""
+    import hashlib
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(STREAM_CHUNK), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def digest_and_analyze(path, known: str = None) -> tuple:
+    """
+    (digest, features) for one file, read once where it fits in memory
+
+    features is UNCHANGED when the digest matches known. files past
+    STREAM_THRESHOLD are hashed and analyzed streaming instead
+    """
+    if os.path.getsize(path) > STREAM_THRESHOLD:
+        digest = file_digest(path)
+        return digest, UNCHANGED if digest == known else analyze_stream(path)
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = content_digest(data)
+    return digest, UNCHANGED if digest == known else analyze_code(decode_source(data))
+
+
+def default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "code_poet")
+
+
+def _or_else(default=None):
+    """
+    a FeatureCache method that, should the database fail mid-run (still
+    locked after the timeout, say), drops the cache with a note and
+    returns default - a run without its cache is slower, not broken
+    """
+    def wrap(method):
+        def guarded(self, *args):
+            if self.db is None:
+                return default
+            try:
+                return method(self, *args)
+            except self.Error as e:
+                self.abandon(e)
+                return default
+        return guarded
+    return wrap
+
+
+class FeatureCache:
+    """
+    features per file in sqlite, keyed on path, mtime, size and content hash
+
+    a matching mtime and size means the file is not even read.
+    a changed mtime with the same content hash skips the analysis.
+    entries for deleted files are dropped after a tree run, and the
+    least recently used go once the cache outgrows its cap.
+
+    writes are committed a batch at a time and hits are only marked
+    used at the end, so a run holds the database briefly and two runs
+    can share it
+    """
+
+    def __init__(self, directory=None, max_bytes: int = CACHE_MAX_BYTES):
+        import sqlite3
+
+        self.Error = sqlite3.Error
+        directory = directory or default_cache_dir()
+        os.makedirs(directory, exist_ok=True)
+        self.db = sqlite3.connect(os.path.join(directory, "features.sqlite"), timeout=CACHE_TIMEOUT)
+        self.max_bytes = max_bytes
+        self.started = time.time()
+        self.used = []
+
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER,"
+            " digest TEXT, features TEXT, used REAL)"
+        )
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != str(ANALYZER_VERSION):
+            self.db.execute("DELETE FROM files")
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (str(ANALYZER_VERSION),))
+        self.db.commit()
+
+    def abandon(self, error):
+        print(f"cache unavailable, analyzing everything: {error}", file=sys.stderr)
+        try:
+            self.db.close()
+        except self.Error:
+            pass
+        self.db = None
+
+    @_or_else((None, None))
+    def lookup(self, path, stat: tuple) -> tuple:
+        """(features, None) on a hit; (None, last known digest) otherwise"""
+        import json
+
+        path = os.path.abspath(path)
+        row = self.db.execute(
+            "SELECT mtime_ns, size, digest, features FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        if row is None:
+            return None, None
+        if (row[0], row[1]) != stat:
+            return None, row[2]
+        self.used.append(path)
+        return json.loads(row[3]), None
+
+    @_or_else()
+    def refresh(self, path, stat: tuple) -> dict:
+        """same content under a new mtime: keep the features, note the stat"""
+        import json
+
+        path = os.path.abspath(path)
+        self.db.execute(
+            "UPDATE files SET mtime_ns = ?, size = ?, used = ? WHERE path = ?",
+            (stat[0], stat[1], time.time(), path),
+        )
+        return json.loads(self.db.execute("SELECT features FROM files WHERE path = ?", (path,)).fetchone()[0])
+
+    @_or_else()
+    def store(self, path, stat: tuple, digest: str, features: dict):
+        import json
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?)",
+            (os.path.abspath(path), stat[0], stat[1], digest, json.dumps(features), time.time()),
+        )
+
+    @_or_else()
+    def lookup_blob(self, blob: str):
+        """features of a git blob seen before, or None"""
+        import json
+
+        key = f"blob:{blob}"
+        row = self.db.execute("SELECT features FROM files WHERE path = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        self.used.append(key)
+        return json.loads(row[0])
+
+    @_or_else()
+    def store_blob(self, blob: str, features: dict):
+        """a blob id names its content forever, so it is key and digest both"""
+        import json
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, 0, 0, ?, ?, ?)",
+            (f"blob:{blob}", blob, json.dumps(features), time.time()),
+        )
+
+    @_or_else()
+    def commit(self):
+        """end the write transaction, if one is open, so other runs can write"""
+        if self.db.in_transaction:
+            self.db.commit()
+
+    def _mark_used(self):
+        """the hits since the last call, marked used in one statement"""
+        now = time.time()
+        self.db.executemany("UPDATE files SET used = ? WHERE path = ?", ((now, path) for path in self.used))
+        self.used.clear()
+
+    @_or_else()
+    def forget_missing(self, root):
+        """drop entries under root that this run never saw (deleted files)"""
+        self._mark_used()
+        prefix = os.path.join(os.path.abspath(root), "")
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        self.db.execute(
+            "DELETE FROM files WHERE path >= ? AND path < ? AND used < ?",
+            (prefix, upper, self.started),
+        )
+        self.db.commit()
+
+    def trim(self):
+        """evict least recently used entries until under max_bytes"""
+        total = self.db.execute("SELECT COALESCE(SUM(LENGTH(features)), 0) FROM files").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        doomed = []
+        for path, length in self.db.execute("SELECT path, LENGTH(features) FROM files ORDER BY used"):
+            if total <= self.max_bytes:
+                break
+            doomed.append((path,))
+            total -= length
+        self.db.executemany("DELETE FROM files WHERE path = ?", doomed)
+
+    @_or_else()
+    def close(self):
+        try:
+            self._mark_used()
+            self.trim()
+            self.db.commit()
+        finally:
+            self.db.close()
+            self.db = None
+
+
+def open_cache(directory=None):
+    """a FeatureCache, or None (with a note) if one can't be opened"""
+    try:
+        return FeatureCache(directory)
+    except Exception as e:
+        print(f"cache unavailable, analyzing everything: {e}", file=sys.stderr)
+        return None
+
+
+def file_features(path, cache: FeatureCache = None) -> dict:
+    """features of one file, from the cache when it is unchanged"""
+    if cache is None:
+        return analyze_path(path)
+    st = os.stat(path)
+    stat = (st.st_mtime_ns, st.st_size)
+    features, known = cache.lookup(path, stat)
+    if features is not None:
+        return features
+    digest, features = digest_and_analyze(path, known)
+    if features == UNCHANGED:
+        return cache.refresh(path, stat) or analyze_path(path)
+    cache.store(path, stat, digest, features)
+    return features
+
+
+def _analyze_batch(jobs: list) -> list:
+    """
+    (path, stat, digest, features) for each (path, stat, known digest)
+
+    features is None when the file is unreadable, and UNCHANGED when
+    its content still matches the known digest
+    """
+    results = []
+    for path, stat, known in jobs:
+        try:
+            results.append((path, stat, *digest_and_analyze(path, known)))
+        except OSError:
+            results.append((path, stat, None, None))
+    return results
+
+
+def _settle(results: list, cache: FeatureCache = None):
+    """record worker results in the cache, a transaction per batch, and yield (path, features)"""
+    for path, stat, digest, features in results:
+        if features == UNCHANGED:
+            # or, if the cache gave out since the lookup, read it after all
+            features = cache.refresh(path, stat) or _analyze_batch([(path, stat, None)])[0][3]
+        elif features is not None and cache is not None:
+            cache.store(path, stat, digest, features)
+        yield path, features
+    if cache is not None:
+        cache.commit()
+
+
+def iter_python_files(root: str):
+    """every .py file under root, lazily, skipping hidden dirs and caches"""
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith(".") and d != "__pycache__")
+        for name in sorted(filenames):
+            if name.endswith(".py"):
+                yield os.path.join(dirpath, name)
+
+
+def analyze_tree(root: str, workers: int = None, cache: FeatureCache = None):
+    """
+    yield (path, features) for every .py file under root, as each finishes
+
+    cache hits come straight back without a read. everything else is
+    read inside the workers, a batch at a time, with only a few
+    batches per worker in flight - the walk, the sources and the
+    results all stream
+    """
+    workers = workers or os.cpu_count() or 1
+    pool = None
+    pending = set()
+    if workers > 1:
+        from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+        pool = ProcessPoolExecutor(workers)
+
+    def run(batch, window):
+        nonlocal pending
+        if pool is None:
+            yield from _settle(_analyze_batch(batch), cache)
+            return
+        pending.add(pool.submit(_analyze_batch, batch))
+        while len(pending) > window:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from _settle(future.result(), cache)
+
+    try:
+        batch = []
+        for path in iter_python_files(root):
+            try:
+                st = os.stat(path)
+            except OSError:
+                yield path, None
+                continue
+            stat = (st.st_mtime_ns, st.st_size)
+            known = None
+            if cache is not None:
+                features, known = cache.lookup(path, stat)
+                if features is not None:
+                    yield path, features
+                    continue
+            batch.append((path, stat, known))
+            if len(batch) >= BATCH_SIZE:
+                yield from run(batch, workers * 4)
+                batch = []
+        if batch:
+            yield from run(batch, workers * 4)
+        if pool is not None:
+            for future in pending:
+                yield from _settle(future.result(), cache)
+        if cache is not None:
+            cache.forget_missing(root)
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+
+# what one analysis can be rendered as; json and jsonl are feature records
+FORMATS = ("poem", "haiku", "json", "jsonl")
+
+
+def feature_record(path, features: dict) -> dict:
+    """a file's (or a tree's) features as one flat, JSON-ready record"""
+    return {"path": str(path), **features}
+
+
+def render_text(fmt: str, name: str, stem: str, features: dict) -> str:
+    """a poem or a haiku from features already extracted"""
+    if fmt == "poem":
+        return poem_from_features(name, features)
+    return haiku_from_features(stem, features)
+
+
+def report_file(path: str, formats: list, cache: FeatureCache = None, record=None):
+    """read and analyze one file once, then print it in every format asked"""
+    import json
+
+    features = file_features(path, cache)
+    record = record or sys.stdout
+    blocks = []
+    for fmt in formats:
+        if fmt == "json":
+            record.write(json.dumps(feature_record(path, features), indent=2) + "\n")
+        elif fmt == "jsonl":
+            record.write(json.dumps(feature_record(path, features)) + "\n")
+        else:
+            blocks.append(render_text(fmt, os.path.basename(path), file_stem(path), features))
+    if blocks:
+        print("\n\n".join(blocks))
+
+
+def poetize_tree(root: str, formats: list = ("poem",), summary: bool = False, workers: int = None,
+                 cache: FeatureCache = None, record=None):
+    """
+    print every file as it is analyzed, then the whole tree
+
+    poems and haiku go to stdout, per file unless summary; json and
+    jsonl feature records go to record (default stdout) - jsonl a
+    line per file as it lands, json one document at the end
+    """
+    if "json" in formats or "jsonl" in formats:
+        import json
+    record = record or sys.stdout
+    text = [fmt for fmt in formats if fmt in ("poem", "haiku")]
+    total = {}
+    records = []
+    for path, features in analyze_tree(root, workers, cache):
+        if features is None:
+            print(f"could not read: {path}", file=sys.stderr)
+            continue
+        add_features(total, features)
+        name = os.path.relpath(path, root)
+        if "jsonl" in formats:
+            record.write(json.dumps(feature_record(name, features)) + "\n")
+        if "json" in formats:
+            records.append(feature_record(name, features))
+        if summary:
+            continue
+        for fmt in text:
+            if fmt == "haiku":
+                print(f"# {name}")
+                print(haiku_from_features(file_stem(path), features))
+            else:
+                print(poem_from_features(name, features))
+            print(flush=True)
+
+    if not total:
+        print(f"no python files under {root}")
+        return
+
+    name = os.path.basename(os.path.realpath(root))
+    for i, fmt in enumerate(text):
+        if i:
+            print()
+        if fmt == "haiku":
+            print(f"# {name} ({total['files']} files)")
+            print(haiku_from_features(name, total))
+        else:
+            print(poem_from_features(f"{name}/", total))
+    if "jsonl" in formats:
+        record.write(json.dumps(feature_record(f"{name}/", total)) + "\n")
+    if "json" in formats:
+        document = {"files": records, "total": feature_record(f"{name}/", total)}
+        record.write(json.dumps(document, indent=2) + "\n")
+    record.flush()
+
+
+def watch_path(path: str, formats: list = ("poem",), summary: bool = False, workers: int = None,
+               cache: FeatureCache = None, poll: bool = False):
+    """
+    render once, then again after every burst of saves
+
+    only the files named in a change are analyzed again; everything
+    else is kept in memory, and the tree poem is summed afresh from it
+    """
+    from watch import Watcher
+
+    text = [fmt for fmt in formats if fmt in ("poem", "haiku")] or ["poem"]
+    root = os.path.abspath(path)
+    single = not os.path.isdir(root)
+    known = {}
+
+    def rescan(top: str):
+        for name, features in analyze_tree(top, workers, cache):
+            if features is not None:
+                known[name] = features
+        if cache is not None:
+            cache.commit()
+
+    def forget(top: str):
+        inside = os.path.join(top, "")
+        for name in [n for n in known if n == top or n.startswith(inside)]:
+            del known[name]
+
+    def render(changed: list):
+        for name in changed:
+            if name not in known or (summary and not single):
+                continue
+            label = os.path.relpath(name, root) if not single else os.path.basename(name)
+            for fmt in text:
+                if fmt == "haiku":
+                    print(f"# {label}")
+                    print(haiku_from_features(file_stem(name), known[name]))
+                else:
+                    print(poem_from_features(label, known[name]))
+                print()
+        if single:
+            return
+        if not known:
+            print(f"no python files under {root}")
+            return
+        total = {}
+        for name in sorted(known):
+            add_features(total, known[name])
+        tree = os.path.basename(root)
+        for fmt in text:
+            if fmt == "haiku":
+                print(f"# {tree} ({total['files']} files)")
+                print(haiku_from_features(tree, total))
+            else:
+                print(poem_from_features(f"{tree}/", total))
+            print()
+
+    if single:
+        known[root] = file_features(root, cache)
+        render([root])
+    else:
+        rescan(root)
+        render([])
+    if cache is not None:
+        # an idle watch must not keep other runs off the cache
+        cache.commit()
+    watcher = Watcher(root, accept=lambda name: name.endswith(".py"), poll=poll)
+    print(f"# watching {root} ({watcher.backend}), ctrl-c to stop", file=sys.stderr, flush=True)
+
+    try:
+        for changed in watcher:
+            if root in changed and not single:
+                # events were lost; the cache keeps a full look cheap
+                known.clear()
+                rescan(root)
+                changed = set()
+            for name in changed:
+                if os.path.isdir(name):
+                    forget(name)
+                    rescan(name)
+                elif os.path.isfile(name):
+                    try:
+                        known[name] = file_features(name, cache)
+                    except OSError:
+                        known.pop(name, None)
+                else:
+                    forget(name)
+            if cache is not None:
+                cache.commit()
+            print(f"# {time.strftime('%H:%M:%S')} - {len(changed) or 'all'} changed", flush=True)
+            render(sorted(changed))
+            sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+# git file modes that hold source (plain and executable files)
+GIT_FILE_MODES = ("100644", "100755")
+
+# the all-zero object id git uses for "no blob on this side"
+GIT_NULL = "0" * 40
+
+
+def git(repo, *args) -> bytes:
+    """run one git command against repo and return its stdout"""
+    import subprocess
+
+    done = subprocess.run(["git", "-C", str(repo), *args], capture_output=True)
+    if done.returncode != 0:
+        raise RuntimeError(done.stderr.decode(errors="replace").strip() or f"git {args[0]} failed")
+    return done.stdout
+
+
+class BlobReader:
+    """one long-lived `git cat-file --batch`, handing out blob contents by id"""
+
+    def __init__(self, repo):
+        import subprocess
+
+        self.proc = subprocess.Popen(
+            ["git", "-C", str(repo), "cat-file", "--batch"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+        )
+
+    def read(self, blob: str) -> bytes:
+        self.proc.stdin.write(blob.encode() + b"\n")
+        self.proc.stdin.flush()
+        header = self.proc.stdout.readline().split()
+        if len(header) < 3:
+            raise RuntimeError(f"git has no blob {blob}")
+        data = self.proc.stdout.read(int(header[2]))
+        self.proc.stdout.read(1)
+        return data
+
+    def close(self):
+        self.proc.stdin.close()
+        self.proc.wait()
+
+
+class GitHistory:
+    """
+    features of a repository commit by commit, analyzing only what changed
+
+    blob ids are the cache key: a blob analyzed once is never read
+    again, here or (with a FeatureCache) in any later run. each commit
+    starts from its parent's totals and applies the diff-tree delta
+    """
+
+    def __init__(self, repo, cache: FeatureCache = None):
+        self.repo = repo
+        self.cache = cache
+        self.blobs = {}
+        self.reader = None
+
+    def features(self, blob: str) -> dict:
+        found = self.blobs.get(blob)
+        if found is None and self.cache is not None:
+            found = self.cache.lookup_blob(blob)
+        if found is None:
+            if self.reader is None:
+                self.reader = BlobReader(self.repo)
+            found = analyze_code(decode_source(self.reader.read(blob)))
+            if self.cache is not None:
+                self.cache.store_blob(blob, found)
+        self.blobs[blob] = found
+        return found
+
+    def tree_total(self, rev: str) -> dict:
+        """features of every .py file in rev's tree, added up"""
+        total = {}
+        for entry in git(self.repo, "ls-tree", "-r", "-z", rev).split(b"\0"):
+            if not entry:
+                continue
+            meta, path = entry.split(b"\t", 1)
+            mode, _, blob = meta.decode().split()
+            if mode in GIT_FILE_MODES and path.endswith(b".py"):
+                add_features(total, self.features(blob))
+        return total
+
+    def changes(self, parent: str, commit: str):
+        """(old blob, new blob) for each .py file that differs, None for absent"""
+        args = ["diff-tree", "-r", "-z", "--no-renames", "--no-commit-id"]
+        args += [parent, commit] if parent else ["--root", commit]
+        fields = git(self.repo, *args).split(b"\0")
+        for meta, path in zip(fields[0::2], fields[1::2]):
+            if not path.endswith(b".py"):
+                continue
+            old_mode, new_mode, old, new, _ = meta.decode().lstrip(":").split()
+            yield (
+                old if old_mode in GIT_FILE_MODES and old != GIT_NULL else None,
+                new if new_mode in GIT_FILE_MODES and new != GIT_NULL else None,
+            )
+
+    def walk(self, revisions: str = "HEAD"):
+        """
+        yield (commit, subject, delta, total) along the first-parent line
+
+        revisions is anything rev-list takes: HEAD, main~20..main, ...
+        """
+        listing = git(self.repo, "rev-list", "--first-parent", "--reverse", "--format=%x01%H %P%x00%s", revisions)
+        total = None
+        for record in listing.decode(errors="replace").split("\1")[1:]:
+            head, subject = record.split("\n", 1)[0].split("\0", 1)
+            commit, *parents = head.split()
+            parent = parents[0] if parents else None
+            if total is None:
+                total = self.tree_total(parent) if parent else {}
+            delta = {"touched": 0}
+            for old, new in self.changes(parent, commit):
+                delta["touched"] += 1
+                if old is not None:
+                    shift_features(total, self.features(old), -1)
+                    shift_features(delta, self.features(old), -1)
+                if new is not None:
+                    shift_features(total, self.features(new), 1)
+                    shift_features(delta, self.features(new), 1)
+                name_changes(delta, self.features(old) if old else None, self.features(new) if new else None)
+            yield commit, subject, delta, dict(total)
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+
+
+def shift_features(total: dict, features: dict, sign: int) -> dict:
+    """add (sign 1) or take away (sign -1) one file's counts"""
+    for key in COUNTED:
+        total[key] = total.get(key, 0) + sign * features[key]
+    total["files"] = total.get("files", 0) + sign
+    return total
+
+
+def name_changes(delta: dict, old: dict, new: dict):
+    """note the functions and classes a change gave and took, a few of each"""
+    from collections import Counter
+
+    for key, born, gone in (("function_names", "functions_born", "functions_gone"),
+                            ("class_names", "classes_born", "classes_gone")):
+        before = Counter(old[key] if old else ())
+        after = Counter(new[key] if new else ())
+        for name in (after - before).elements():
+            kept = delta.setdefault(born, [])
+            if len(kept) < NAMES_KEPT:
+                kept.append(name)
+        for name in (before - after).elements():
+            kept = delta.setdefault(gone, [])
+            if len(kept) < NAMES_KEPT:
+                kept.append(name)
+
+
+# how a count moving up or down reads, per feature
+GROWTH = {
+    "functions": ("rituals added", "rituals retired"),
+    "classes": ("blueprints drawn", "blueprints torn"),
+    "loops": ("the wheel gains turns", "the wheel slows"),
+    "conditionals": ("new forks in the path", "paths converge"),
+    "returns": ("more is given back", "less is given back"),
+    "imports": ("new dependencies arrive", "old debts paid"),
+    "comments": ("the author says more", "the author falls quiet"),
+    "docstrings": ("more is explained", "explanations fade"),
+}
+
+
+def delta_poem(commit: str, subject: str, delta: dict, total: dict, rng=None) -> str:
+    """a poem about what one commit did to the code"""
+    rng = rng or random
+    lines = []
+
+    lines.append(f"commit {commit[:7]}: {subject}")
+    lines.append("=" * len(lines[0]))
+    lines.append("")
+
+    if not delta["touched"]:
+        lines.append("no python moved here")
+        lines.append("the code holds its breath")
+        lines.append("")
+    else:
+        grew = delta.get("lines", 0)
+        lines.append(f"{delta['touched']} files touched, "
+                     f"{abs(grew)} lines {'grown' if grew >= 0 else 'let go'}")
+        lines.append("")
+
+        for key, phrase in (("functions_born", "born"), ("functions_gone", "gone"),
+                            ("classes_born", "born"), ("classes_gone", "gone")):
+            for name in delta.get(key, ())[:3]:
+                kind = "function" if key.startswith("functions") else "class"
+                lines.append(f"  {rng.choice(VOCAB[kind])} - '{poeticize_name(name)}' {phrase}")
+        if any(key in delta for key in ("functions_born", "functions_gone", "classes_born", "classes_gone")):
+            lines.append("")
+
+        moved = [(key, delta.get(key, 0)) for key in GROWTH if delta.get(key, 0)]
+        for key, change in moved:
+            up, down = GROWTH[key]
+            lines.append(f"  {change:+d} {key} - {up if change > 0 else down}")
+        if moved:
+            lines.append("")
+
+    lines.append(f"the whole: {total.get('files', 0)} files, "
+                 f"{total.get('functions', 0)} functions, {total.get('lines', 0)} lines")
+    lines.append(rng.choice(META))
+
+    return "\n".join(lines)
+
+
+def poetize_history(repo: str, revisions: str, formats: list = ("poem",), cache: FeatureCache = None,
+                    record=None):
+    """a poem (and/or a record) per commit, from only the blobs that changed"""
+    if "json" in formats or "jsonl" in formats:
+        import json
+    record = record or sys.stdout
+    history = GitHistory(repo, cache)
+    records = []
+    try:
+        for commit, subject, delta, total in history.walk(revisions):
+            entry = {"commit": commit, "subject": subject, "delta": delta, "total": total}
+            if "jsonl" in formats:
+                record.write(json.dumps(entry) + "\n")
+            if "json" in formats:
+                records.append(entry)
+            for fmt in formats:
+                if fmt == "poem":
+                    print(delta_poem(commit, subject, delta, total))
+                elif fmt == "haiku":
+                    print(f"# {commit[:7]}")
+                    print(haiku_from_features(commit[:7], {**dict.fromkeys(COUNTED, 0), **total}))
+                else:
+                    continue
+                print(flush=True)
+            if cache is not None:
+                cache.commit()
+        if "json" in formats:
+            record.write(json.dumps(records, indent=2) + "\n")
+        record.flush()
+    finally:
+        history.close()
+
+
+def pop_report_options(argv: list):
+    """remove --report FORMATS / --record FILE from argv; (formats, file)"""
+    formats = None
+    record = None
+    i = 1
+    while i < len(argv):
+        if argv[i] == "--report" and i + 1 < len(argv):
+            formats = argv[i + 1].split(",")
+            del argv[i:i + 2]
+        elif argv[i] == "--record" and i + 1 < len(argv):
+            record = argv[i + 1]
+            del argv[i:i + 2]
+        else:
+            i += 1
+    return formats, record
+
+
+def pop_cache_options(argv: list):
+    """remove --no-cache / --cache-dir DIR from argv; (use cache, its dir)"""
+    use = True
+    directory = None
+    i = 1
+    while i < len(argv):
+        if argv[i] == "--no-cache":
+            use = False
+            del argv[i]
+        elif argv[i] == "--cache-dir" and i + 1 < len(argv):
+            directory = argv[i + 1]
+            del argv[i:i + 2]
+        else:
+            i += 1
+    return use, directory
 
 
 def main():
+    workers, seed = pop_options(sys.argv)
+    if seed is not None:
+        random.seed(seed)
+    use_cache, cache_dir = pop_cache_options(sys.argv)
+    formats, record_path = pop_report_options(sys.argv)
+    revisions = None
+    if "--git" in sys.argv:
+        at = sys.argv.index("--git")
+        following = sys.argv[at + 1:at + 2]
+        revisions = following[0] if following and not following[0].startswith("--") else "HEAD"
+        del sys.argv[at:at + (2 if following and following[0] == revisions else 1)]
+
     if len(sys.argv) < 2:
         print("code_poet - writes poetry about code")
         print()
         print("usage:")
         print("  code_poet.py <file.py>          # generate poem")
         print("  code_poet.py <file.py> --haiku  # generate haiku")
+        print("  code_poet.py <dir>              # a poem per file, then one for the tree")
+        print("  code_poet.py <dir> --summary    # only the poem for the tree")
+        print("  code_poet.py <dir> --workers N  # analyze across N processes (default: all cores)")
+        print("  code_poet.py <repo> --git [REVS]")
+        print("                                  # a poem per commit on the first-parent line")
+        print("                                  # (REVS as for rev-list, e.g. main~20..main)")
+        print("  code_poet.py <path> --watch     # re-render on every save (--poll: no inotify)")
+        print("  code_poet.py ... --report poem,haiku,json")
+        print("                                  # analyze once, render each (also: jsonl)")
+        print("  code_poet.py ... --record FILE  # write json/jsonl records to FILE")
+        print("  code_poet.py ... --no-cache     # reanalyze every file")
+        print("  code_poet.py ... --cache-dir D  # keep the feature cache in D")
+        print(f"                                  # (default: {default_cache_dir()})")
         print()
         print("example:")
         print("  code_poet.py selfsame.py")
         return
 
-    filepath = Path(sys.argv[1])
+    filepath = sys.argv[1]
 
-    if not filepath.exists():
+    if not os.path.exists(filepath):
         print(f"file not found: {filepath}")
         return
 
-    if "--haiku" in sys.argv:
-        print(generate_haiku(filepath))
-    else:
-        print(generate_poem(filepath))
+    if formats is None:
+        formats = ["haiku"] if "--haiku" in sys.argv else ["poem"]
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        print(f"unknown format: {', '.join(unknown)} (choose from {', '.join(FORMATS)})")
+        return
+
+    try:
+        record = open(record_path, "w") if record_path else None
+    except OSError as e:
+        print(f"cannot record to {record_path}: {e}", file=sys.stderr)
+        sys.exit(1)
+    cache = open_cache(cache_dir) if use_cache else None
+    try:
+        if "--watch" in sys.argv:
+            watch_path(filepath, formats, "--summary" in sys.argv, workers, cache, "--poll" in sys.argv)
+        elif revisions:
+            try:
+                poetize_history(filepath, revisions, formats, cache, record)
+            except (RuntimeError, FileNotFoundError) as e:
+                # git missing, not a repository, or an unknown revision
+                print(f"git: {e}", file=sys.stderr)
+                sys.exit(1)
+        elif os.path.isdir(filepath):
+            poetize_tree(filepath, formats, "--summary" in sys.argv, workers, cache, record)
+        else:
+            report_file(filepath, formats, cache, record)
+    except BrokenPipeError:
+        # reader went away (e.g. piped into head); stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+    finally:
+        if cache is not None:
+            cache.close()
+        if record is not None:
+            record.close()
 
 
 if __name__ == "__main__":
@@ -3,10 +3,13 @@
 murmur - small signals from undefined coordinates
 """
 
-import json
+import os
 import random
 import sys
-from datetime import datetime
+from itertools import islice
+
+from permute import KeyedPermutation
+from workers import generate
 
 # fragments of observation
 OPENINGS = [
@@ -192,28 +195,221 @@ THEMES = {
 }
 
 
-def murmur(theme: str = None):
+def murmur(theme: str = None, rng=None):
     """generate a single murmur"""
+    rng = rng or random
     if theme and theme in THEMES:
         t = THEMES[theme]
-        if random.random() < 0.3:
-            return random.choice(t["solitary"])
+        if rng.random() < 0.3:
+            return rng.choice(t["solitary"])
         else:
-            return f"{random.choice(t['openings'])}, {random.choice(t['middles'])} {random.choice(t['closings'])}"
+            return f"{rng.choice(t['openings'])}, {rng.choice(t['middles'])} {rng.choice(t['closings'])}"
     else:
-        if random.random() < 0.3:
+        if rng.random() < 0.3:
             # sometimes, a solitary thought
-            return random.choice(SOLITARY)
+            return rng.choice(SOLITARY)
         else:
             # sometimes, a constructed fragment
-            return f"{random.choice(OPENINGS)}, {random.choice(MIDDLES)} {random.choice(CLOSINGS)}"
+            return f"{rng.choice(OPENINGS)}, {rng.choice(MIDDLES)} {rng.choice(CLOSINGS)}"
+
+
+# flattened choice tables for murmur_batch, built on first use per theme
+_TABLES = {}
+
+
+def _tables(theme: str = None):
+    """solitary list, sizes and every constructed murmur pre-assembled"""
+    key = theme if theme in THEMES else None
+    if key not in _TABLES:
+        if key:
+            t = THEMES[key]
+            openings, middles, closings, solitary = t["openings"], t["middles"], t["closings"], t["solitary"]
+        else:
+            openings, middles, closings, solitary = OPENINGS, MIDDLES, CLOSINGS, SOLITARY
+        constructed = [f"{o}, {m} {c}" for o in openings for m in middles for c in closings]
+        sizes = (len(solitary), len(openings), len(middles), len(closings))
+        _TABLES[key] = (solitary, sizes, constructed)
+    return _TABLES[key]
+
+
+def murmur_batch(count: int, theme: str = None, rng=None) -> list:
+    """
+    generate count murmurs in one pass
+
+    every constructed murmur is pre-assembled, so each one costs a roll
+    and three index draws instead of a call and an f-string.
+    the draws are the ones random.choice makes (getrandbits with
+    rejection), one for one, so a seeded run gives the same murmurs
+    from either path.
+
+    they stay one call each: a rejected draw shifts every murmur after
+    it, so words taken in bulk (one long getrandbits, or numpy's
+    MT19937 loaded from getstate) still have to be walked murmur by
+    murmur in python - and that walk is slower than this loop
+    """
+    solitary, (ns, no, nm, nc), constructed = _tables(theme)
+    ks, ko, km, kc = ns.bit_length(), no.bit_length(), nm.bit_length(), nc.bit_length()
+    row = nm * nc
+    rng = rng or random
+    roll = rng.random
+    bits = rng.getrandbits
+
+    murmurs = []
+    append = murmurs.append
+    for _ in range(count):
+        if roll() < 0.3:
+            s = bits(ks)
+            while s >= ns:
+                s = bits(ks)
+            append(solitary[s])
+        else:
+            o = bits(ko)
+            while o >= no:
+                o = bits(ko)
+            m = bits(km)
+            while m >= nm:
+                m = bits(km)
+            c = bits(kc)
+            while c >= nc:
+                c = bits(kc)
+            append(constructed[o * row + m * nc + c])
+    return murmurs
+
+
+def space_size(theme: str = None) -> int:
+    """how many distinct murmurs a theme can produce"""
+    solitary, (ns, no, nm, nc), constructed = _tables(theme)
+    return ns + no * nm * nc
+
+
+def murmur_at(index: int, theme: str = None) -> str:
+    """
+    the murmur at a position in the theme's space
+
+    solitary murmurs come first, then every constructed
+    opening/middle/closing combination in table order
+    """
+    solitary, (ns, no, nm, nc), constructed = _tables(theme)
+    if not 0 <= index < ns + no * nm * nc:
+        raise IndexError(f"murmur index out of range: {index}")
+    if index < ns:
+        return solitary[index]
+    return constructed[index - ns]
+
+
+# murmur -> index maps for murmur_index, built on first use per theme
+_INDEXES = {}
+
+
+def murmur_index(text: str, theme: str = None) -> int:
+    """the position of a murmur in the theme's space (inverse of murmur_at)"""
+    key = theme if theme in THEMES else None
+    if key not in _INDEXES:
+        solitary, sizes, constructed = _tables(key)
+        positions = {m: i for i, m in enumerate(solitary + constructed)}
+        _INDEXES[key] = positions
+    try:
+        return _INDEXES[key][text]
+    except KeyError:
+        raise ValueError(f"not a murmur in this theme: {text!r}") from None
+
+
+def iter_unique(theme: str = None, seed=None, cursor: int = 0):
+    """
+    yield (cursor, murmur) without repeats until the space runs out
+
+    walks a seeded permutation of the theme's index space, so
+    nothing has to remember what was already said. the cursor
+    after each murmur is where a later run can resume
+    """
+    order = KeyedPermutation(space_size(theme), seed)
+    for position in order.iter(cursor):
+        cursor += 1
+        yield cursor, murmur_at(position, theme)
+
+
+# murmurs generated per batch, and per write, when streaming
+CHUNK_SIZE = 65536
+
+
+def iter_murmurs(theme: str = None, seed=None, count: int = None, rng=None):
+    """
+    yield murmurs lazily, count of them or forever
+
+    generated a batch at a time, so memory stays flat however
+    many are asked for. a seed gives the same sequence as
+    seeding and calling murmur() in a loop
+    """
+    rng = rng or random
+    if seed is not None:
+        rng.seed(seed)
+    remaining = count
+    while remaining is None or remaining > 0:
+        n = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+        yield from murmur_batch(n, theme, rng)
+        if remaining is not None:
+            remaining -= n
+
+
+def write_chunks(lines, out=None):
+    """write an iterable of lines in large joined chunks"""
+    out = out or sys.stdout
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, CHUNK_SIZE))
+        if not chunk:
+            break
+        out.write("\n".join(chunk) + "\n")
+
+
+def _quoted(murmurs):
+    """json-encode murmurs, remembering the (small) set already seen"""
+    import json
+
+    seen = {}
+    for m in murmurs:
+        q = seen.get(m)
+        if q is None:
+            q = seen[m] = json.dumps(m)
+        yield q
+
+
+def _json_document(murmurs, count, theme, seed):
+    """the --json document, a line at a time, same bytes as json.dumps(indent=2)"""
+    import json
+    from datetime import datetime
+
+    yield "{"
+    yield f'  "timestamp": {json.dumps(datetime.now().isoformat())},'
+    yield f'  "count": {json.dumps(count)},'
+    yield f'  "theme": {json.dumps(theme)},'
+    yield f'  "seed": {json.dumps(seed)},'
+    quoted = _quoted(murmurs)
+    first = next(quoted, None)
+    if first is None:
+        yield '  "murmurs": []'
+    else:
+        yield '  "murmurs": ['
+        previous = first
+        for q in quoted:
+            yield f"    {previous},"
+            previous = q
+        yield f"    {previous}"
+        yield "  ]"
+    yield "}"
 
 
 def main():
     count = 1
     as_json = False
+    as_jsonl = False
     theme = None
     seed = None
+    index = None
+    rank = None
+    unique = False
+    cursor = 0
+    workers = None
 
     args = sys.argv[1:]
     i = 0
@@ -221,6 +417,8 @@ def main():
         arg = args[i]
         if arg == "--json":
             as_json = True
+        elif arg == "--jsonl":
+            as_jsonl = True
         elif arg == "--count" and i + 1 < len(args):
             try:
                 count = int(args[i + 1])
@@ -237,6 +435,31 @@ def main():
                 # allow string seeds too
                 seed = args[i + 1]
             i += 1
+        elif arg == "--index" and i + 1 < len(args):
+            index = args[i + 1]
+            i += 1
+        elif arg == "--rank" and i + 1 < len(args):
+            rank = args[i + 1]
+            i += 1
+        elif arg == "--unique":
+            unique = True
+        elif arg == "--cursor" and i + 1 < len(args):
+            try:
+                cursor = max(int(args[i + 1]), 0)
+            except ValueError:
+                pass
+            i += 1
+        elif arg == "--workers" and i + 1 < len(args):
+            try:
+                workers = max(int(args[i + 1]), 1)
+            except ValueError:
+                pass
+            i += 1
+        elif arg == "--space":
+            print(f"  (default): {space_size():,}")
+            for t in THEMES:
+                print(f"  {t}: {space_size(t):,}")
+            return
         elif arg == "--themes":
             print("available themes:")
             for t in THEMES:
@@ -251,7 +474,15 @@ def main():
             print("  murmur.py --theme <name> # use themed mode")
             print("  murmur.py --themes  # list available themes")
             print("  murmur.py --seed N  # set random seed for reproducibility")
+            print("  murmur.py --index N # the murmur at position N")
+            print("  murmur.py --rank <murmur> # position of a murmur")
+            print("  murmur.py --space   # size of each theme's murmur space")
+            print("  murmur.py --unique  # no repeats until the space is exhausted")
+            print("  murmur.py --unique --seed S --cursor N # resume a unique run")
+            print("  murmur.py --workers N # generate across N processes")
+            print("                      # (a seed gives the same output for any N)")
             print("  murmur.py --json    # JSON output")
+            print("  murmur.py --jsonl   # one JSON record per line, streamed")
             print("  murmur.py --help    # this help")
             print()
             print("themes: dark, light, cosmic")
@@ -263,24 +494,55 @@ def main():
                 pass
         i += 1
 
-    # set seed if provided for reproducible randomness
-    if seed is not None:
-        random.seed(seed)
+    if index is not None or rank is not None:
+        try:
+            if index is not None:
+                print(murmur_at(int(index), theme))
+            if rank is not None:
+                print(murmur_index(rank, theme))
+        except (ValueError, IndexError) as e:
+            print(e)
+        return
+
+    if unique:
+        if seed is None:
+            # a resumable walk needs a known key
+            seed = random.getrandbits(32)
+        walk = iter_unique(theme, seed, cursor)
+        reached = [cursor]
 
-    murmurs = [murmur(theme) for _ in range(count)]
+        def unique_murmurs():
+            for reached[0], m in islice(walk, max(count, 0)):
+                yield m
+
+        murmurs = unique_murmurs()
+    elif workers:
+        # per-block seeded streams, independent of the worker count
+        murmurs = generate(murmur_batch, max(count, 0), seed, workers, (theme,))
+    else:
+        # seeded inside iter_murmurs for reproducible randomness
+        murmurs = iter_murmurs(theme, seed, max(count, 0))
 
     if as_json:
-        output = {
-            "timestamp": datetime.now().isoformat(),
-            "count": count,
-            "theme": theme,
-            "seed": seed,
-            "murmurs": murmurs,
-        }
-        print(json.dumps(output, indent=2))
+        lines = _json_document(murmurs, count, theme, seed)
+    elif as_jsonl:
+        lines = (f'{{"n": {n}, "murmur": {q}}}' for n, q in enumerate(_quoted(murmurs)))
     else:
-        for m in murmurs:
-            print(m)
+        lines = murmurs
+
+    try:
+        write_chunks(lines)
+        sys.stdout.flush()
+        if unique:
+            size = space_size(theme)
+            if reached[0] >= size:
+                print(f"space exhausted: all {size:,} murmurs given", file=sys.stderr)
+            else:
+                print(f"resume with: --unique --seed {seed} --cursor {reached[0]}", file=sys.stderr)
+    except BrokenPipeError:
+        # reader went away (e.g. piped into head); stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
 
 
 if __name__ == "__main__":
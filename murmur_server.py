@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+murmur_server - murmurs on tap
+
+one long-lived process, every generator already warm.
+a ring buffer per generator and theme is kept full in the background,
+so answering a request is only taking from the front
+
+protocol: one request per line, one JSON line back
+  murmur dark count=3   ->  {"items": ["...", "...", "..."]}
+"""
+
+import asyncio
+import json
+import random
+import sys
+from collections import deque
+
+import chain_murmur
+import murmur
+import poem
+import prompt
+import self_verse
+import verse
+
+BUFFER_SIZE = 4096
+REFILL_BATCH = 32
+MAX_COUNT = 10000
+MAX_LINE = 65536
+
+
+def _each(func):
+    """batch filler from a one-at-a-time generator taking (arg, rng)"""
+    return lambda n, arg, rng: [func(arg, rng) for _ in range(n)]
+
+
+# name -> (fill(n, arg, rng) -> list, accepted args)
+GENERATORS = {
+    "murmur": (murmur.murmur_batch, {None, *murmur.THEMES}),
+    "haiku": (_each(lambda arg, rng: verse.haiku(rng)), {None}),
+    "free": (_each(lambda arg, rng: verse.free_verse(rng=rng)), {None}),
+    "concrete": (_each(lambda arg, rng: verse.concrete_poem(rng)), {None}),
+    "poem": (poem.generate_poems, {None, *poem.STYLES}),
+    "prompt": (prompt.generate_batch, {None, *prompt.TEMPLATES}),
+    "starter": (_each(lambda arg, rng: prompt.generate_conversation_starter(rng)), {None}),
+    "meta": (_each(lambda arg, rng: self_verse.meta_poem(rng)), {None}),
+    "recursive": (_each(lambda arg, rng: self_verse.recursive_verse(rng=rng)), {None}),
+    "hybrid": (_each(lambda arg, rng: self_verse.murmur_verse_hybrid(rng)), {None}),
+    "chain": (lambda n, arg, rng: chain_murmur.chain_murmur(n, rng), {None}),
+}
+
+# these read live state, so they are never served from a buffer
+UNBUFFERED = {"chain"}
+
+
+class Buffers:
+    """a ring of ready items per (generator, arg), refilled in the background"""
+
+    def __init__(self, seed=None, size: int = BUFFER_SIZE):
+        self.seed = seed
+        self.size = size
+        self.rings = {}
+        self.rngs = {}
+        self.hungry = asyncio.Event()
+
+    def rng(self, key) -> random.Random:
+        """each key draws from its own stream, so a seed fixes what it serves"""
+        if key not in self.rngs:
+            name, arg = key
+            self.rngs[key] = random.Random(None if self.seed is None else f"{self.seed}:{name}:{arg}")
+        return self.rngs[key]
+
+    def ring(self, key) -> deque:
+        if key not in self.rings:
+            self.rings[key] = deque(maxlen=self.size)
+            self.hungry.set()
+        return self.rings[key]
+
+    def prefill(self):
+        """create a ring for every buffered generator and argument"""
+        for name, (fill, args) in GENERATORS.items():
+            if name not in UNBUFFERED:
+                for arg in args:
+                    self.ring((name, arg))
+
+    def take(self, name: str, arg, count: int) -> list:
+        """count items, from the ring first and freshly made past that"""
+        key = (name, arg)
+        fill = GENERATORS[name][0]
+        if name in UNBUFFERED:
+            return fill(count, arg, self.rng(key))
+
+        ring = self.ring(key)
+        n = min(count, len(ring))
+        items = [ring.popleft() for _ in range(n)]
+        if n < count:
+            items.extend(fill(count - n, arg, self.rng(key)))
+        if len(ring) < self.size // 2:
+            self.hungry.set()
+        return items
+
+    async def refill(self):
+        """top up any ring that has been drawn down, a batch at a time"""
+        while True:
+            await self.hungry.wait()
+            self.hungry.clear()
+            for key, ring in list(self.rings.items()):
+                name, arg = key
+                fill = GENERATORS[name][0]
+                while len(ring) < self.size:
+                    ring.extend(fill(min(REFILL_BATCH, self.size - len(ring)), arg, self.rng(key)))
+                    # let requests in between batches
+                    await asyncio.sleep(0)
+
+
+def parse_request(line: str) -> tuple:
+    """'<generator> [arg] [count=N]' -> (name, arg, count), or raise ValueError"""
+    words = line.split()
+    name = words[0]
+    if name not in GENERATORS:
+        raise ValueError(f"unknown generator: {name}")
+
+    arg = None
+    count = 1
+    for word in words[1:]:
+        if word.startswith("count="):
+            try:
+                count = int(word[6:])
+            except ValueError:
+                raise ValueError(f"bad count: {word[6:]}") from None
+            if not 0 <= count <= MAX_COUNT:
+                raise ValueError(f"count must be 0..{MAX_COUNT}")
+        else:
+            arg = word
+
+    if arg not in GENERATORS[name][1]:
+        raise ValueError(f"unknown {name} argument: {arg}")
+    return name, arg, count
+
+
+class MurmurProtocol(asyncio.Protocol):
+    """line in, JSON line out"""
+
+    def __init__(self, buffers: Buffers):
+        self.buffers = buffers
+        self.pending = b""
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data: bytes):
+        self.pending += data
+        *lines, self.pending = self.pending.split(b"\n")
+        if len(self.pending) > MAX_LINE:
+            self.transport.close()
+            return
+        replies = [self.respond(line) for line in lines if line.strip()]
+        if replies:
+            self.transport.write(b"".join(replies))
+
+    def respond(self, line: bytes) -> bytes:
+        try:
+            name, arg, count = parse_request(line.decode(errors="replace"))
+            reply = {"items": self.buffers.take(name, arg, count)}
+        except ValueError as e:
+            reply = {"error": str(e)}
+        return (json.dumps(reply) + "\n").encode()
+
+
+async def serve(tcp: str = None, unix: str = None, seed=None, size: int = BUFFER_SIZE):
+    buffers = Buffers(seed, size)
+    buffers.prefill()
+    refiller = asyncio.create_task(buffers.refill())
+
+    loop = asyncio.get_running_loop()
+    if unix:
+        server = await loop.create_unix_server(lambda: MurmurProtocol(buffers), unix)
+        where = unix
+    else:
+        host, _, port = (tcp or "127.0.0.1:7007").rpartition(":")
+        server = await loop.create_server(lambda: MurmurProtocol(buffers), host or "127.0.0.1", int(port))
+        where = f"{host or '127.0.0.1'}:{port}"
+
+    print(f"murmur_server listening on {where}", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        refiller.cancel()
+
+
+def main():
+    tcp = None
+    unix = None
+    seed = None
+    size = BUFFER_SIZE
+
+    args = sys.argv[1:]
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg == "--tcp" and i + 1 < len(args):
+            tcp = args[i + 1]
+            i += 1
+        elif arg == "--unix" and i + 1 < len(args):
+            unix = args[i + 1]
+            i += 1
+        elif arg == "--seed" and i + 1 < len(args):
+            try:
+                seed = int(args[i + 1])
+            except ValueError:
+                # allow string seeds too
+                seed = args[i + 1]
+            i += 1
+        elif arg == "--buffer" and i + 1 < len(args):
+            try:
+                size = max(int(args[i + 1]), 1)
+            except ValueError:
+                pass
+            i += 1
+        else:
+            print("murmur_server - murmurs on tap")
+            print()
+            print("usage:")
+            print("  murmur_server.py                  # listen on 127.0.0.1:7007")
+            print("  murmur_server.py --tcp HOST:PORT  # listen on a TCP address")
+            print("  murmur_server.py --unix PATH      # listen on a unix socket")
+            print("  murmur_server.py --seed S         # reproducible streams")
+            print("  murmur_server.py --buffer N       # ring size per generator (default 4096)")
+            print()
+            print("requests, one per line:")
+            print("  <generator> [arg] [count=N]")
+            print(f"  generators: {', '.join(GENERATORS)}")
+            print()
+            print("example:")
+            print("  echo 'murmur dark count=3' | nc -q1 127.0.0.1 7007")
+            return
+        i += 1
+
+    try:
+        asyncio.run(serve(tcp, unix, seed, size))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
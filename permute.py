@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+permute - a keyed shuffle of 0..n-1 that remembers nothing
+
+a small feistel network over the next even power of two,
+walked in cycles until it lands back inside the range.
+every index maps to exactly one other, so walking 0, 1, 2...
+visits the whole space once, in a seeded order,
+without keeping a list of where it has been
+"""
+
+ROUNDS = 4
+
+MASK64 = (1 << 64) - 1
+
+
+def _mix(x: int) -> int:
+    """splitmix64 finalizer - cheap, well spread bits"""
+    x = (x ^ (x >> 30)) * 0xBF58476D1CE4E5B9 & MASK64
+    x = (x ^ (x >> 27)) * 0x94D049BB133111EB & MASK64
+    return x ^ (x >> 31)
+
+
+class KeyedPermutation:
+    """a seeded bijection on range(size)"""
+
+    def __init__(self, size: int, key=None):
+        import hashlib
+
+        if size < 0:
+            raise ValueError(f"size must be non-negative: {size}")
+        self.size = size
+        self.key = key
+        # split the index into two halves of equal width
+        self.half = max(1, ((size - 1).bit_length() + 1) // 2)
+        self.half_mask = (1 << self.half) - 1
+        digest = hashlib.sha256(repr(key).encode()).digest()
+        self.round_keys = [
+            int.from_bytes(digest[i * 8:(i + 1) * 8], "little") for i in range(ROUNDS)
+        ]
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _encrypt(self, x: int) -> int:
+        half, mask = self.half, self.half_mask
+        left, right = x >> half, x & mask
+        for k in self.round_keys:
+            left, right = right, left ^ (_mix(right ^ k) & mask)
+        return (left << half) | right
+
+    def __getitem__(self, index: int) -> int:
+        """the position that index is shuffled to"""
+        if not 0 <= index < self.size:
+            raise IndexError(f"permutation index out of range: {index}")
+        # cycle-walk: the domain is at most 4x size, so this settles fast
+        x = self._encrypt(index)
+        while x >= self.size:
+            x = self._encrypt(x)
+        return x
+
+    def iter(self, start: int = 0):
+        """yield the shuffled positions from start to the end of the space"""
+        for index in range(start, self.size):
+            yield self[index]
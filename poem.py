@@ -9,7 +9,8 @@ the compiler reads and weeps
 
 import random
 import sys
-from datetime import datetime
+
+from workers import generate, pop_options
 
 # vocabulary for code-like poems
 KEYWORDS = ["def", "class", "if", "while", "for", "return", "import", "from", "try", "except", "with", "yield"]
@@ -77,158 +78,219 @@ ASPIRATIONS = [
 ]
 
 
-def random_param():
-    return random.choice(["self", "*thoughts", "nothing=None", "moment"])
+def random_param(rng=None):
+    rng = rng or random
+    return rng.choice(["self", "*thoughts", "nothing=None", "moment"])
+
+
+# one builder per expression shape, so only the chosen one is drawn
+EXPRESSIONS = [
+    lambda rng: f"{rng.choice(NOUNS)}.{rng.choice(VERBS)}()",
+    lambda rng: f"[{rng.choice(NOUNS)} for _ in {rng.choice(ABSTRACTIONS)}]",
+    lambda rng: f"lambda: {rng.choice(VERBS)}({rng.choice(NOUNS)})",
+    lambda rng: "None  # or everything",
+]
+
+
+def random_expression(rng=None):
+    rng = rng or random
+    return rng.choice(EXPRESSIONS)(rng)
+
+
+# how to draw each template slot
+SLOTS = {
+    "verb": lambda rng: rng.choice(VERBS),
+    "noun": lambda rng: rng.choice(NOUNS),
+    "Noun": lambda rng: rng.choice(NOUNS).title(),
+    "adjective": lambda rng: rng.choice(ADJECTIVES),
+    "abstraction": lambda rng: rng.choice(ABSTRACTIONS),
+    "param": random_param,
+    "expression": random_expression,
+    "other": lambda rng: rng.choice(NOUNS),
+    "Parent": lambda rng: rng.choice(["Being", "Void", "Observer", "Self"]),
+    "thought": lambda rng: rng.choice(THOUGHTS),
+    "aspiration": lambda rng: rng.choice(ASPIRATIONS),
+    "place": lambda rng: rng.choice(["future", "past", "elsewhere", "within"]),
+    "verbs": lambda rng: rng.choice(VERBS) + "s",
+}
 
 
-def random_expression():
-    return random.choice([
-        f"{random.choice(NOUNS)}.{random.choice(VERBS)}()",
-        f"[{random.choice(NOUNS)} for _ in {random.choice(ABSTRACTIONS)}]",
-        f"lambda: {random.choice(VERBS)}({random.choice(NOUNS)})",
-        "None  # or everything",
-    ])
+def compile_template(template: str) -> tuple:
+    """
+    split a template into parts once, ahead of rendering
+
+    returns (parts, slots): literal text with a gap for every
+    {slot}, and (gap, draw) pairs for just the slots it uses
+    """
+    parts = []
+    slots = []
+    end = 0
+    start = template.find("{")
+    while start != -1:
+        close = template.index("}", start)
+        parts.append(template[end:start])
+        slots.append((len(parts), SLOTS[template[start + 1:close]]))
+        parts.append(None)
+        end = close + 1
+        start = template.find("{", end)
+    parts.append(template[end:])
+    return parts, tuple(slots)
+
+
+COMPILED = {
+    template_type: [compile_template(t) for t in templates]
+    for template_type, templates in TEMPLATES.items()
+}
 
 
-def generate_line(template_type: str) -> str:
+def generate_line(template_type: str, rng=None) -> str:
     """generate a single code-shaped line"""
-    template = random.choice(TEMPLATES[template_type])
-
-    line = template.format(
-        verb=random.choice(VERBS),
-        noun=random.choice(NOUNS),
-        Noun=random.choice(NOUNS).title(),
-        adjective=random.choice(ADJECTIVES),
-        abstraction=random.choice(ABSTRACTIONS),
-        param=random_param(),
-        expression=random_expression(),
-        other=random.choice(NOUNS),
-        Parent=random.choice(["Being", "Void", "Observer", "Self"]),
-        thought=random.choice(THOUGHTS),
-        aspiration=random.choice(ASPIRATIONS),
-        place=random.choice(["future", "past", "elsewhere", "within"]),
-        verbs=random.choice(VERBS) + "s",
-    )
-
-    return line
-
-
-def generate_function_poem() -> str:
+    rng = rng or random
+    parts, slots = rng.choice(COMPILED[template_type])
+
+    # draw only what this template asks for
+    parts = parts[:]
+    for gap, draw in slots:
+        parts[gap] = draw(rng)
+    return "".join(parts)
+
+
+def generate_function_poem(rng=None) -> str:
     """generate a poem that looks like a function"""
+    rng = rng or random
     lines = []
 
     # docstring
     lines.append('"""')
-    lines.append(f"{random.choice(ADJECTIVES)} {random.choice(NOUNS)}")
+    lines.append(f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}")
     lines.append("")
-    lines.append(random.choice(THOUGHTS))
+    lines.append(rng.choice(THOUGHTS))
     lines.append('"""')
 
     # definition
-    lines.append(generate_line("function_def"))
+    lines.append(generate_line("function_def", rng))
 
     # body with indentation
-    for _ in range(random.randint(3, 6)):
-        line_type = random.choice(["comment", "assignment", "conditional"])
-        line = generate_line(line_type)
+    for _ in range(rng.randint(3, 6)):
+        line_type = rng.choice(["comment", "assignment", "conditional"])
+        line = generate_line(line_type, rng)
         if line_type == "conditional":
             lines.append(f"    {line}")
-            lines.append(f"        {generate_line('assignment')}")
+            lines.append(f"        {generate_line('assignment', rng)}")
         else:
             lines.append(f"    {line}")
 
     # return
-    lines.append(f"    {generate_line('return')}")
+    lines.append(f"    {generate_line('return', rng)}")
 
     return "\n".join(lines)
 
 
-def generate_class_poem() -> str:
+def generate_class_poem(rng=None) -> str:
     """generate a poem that looks like a class"""
-    noun = random.choice(NOUNS).title()
-    parent = random.choice(["Being", "Void", "Observer", "Self"])
+    rng = rng or random
+    noun = rng.choice(NOUNS).title()
+    parent = rng.choice(["Being", "Void", "Observer", "Self"])
 
     lines = []
     lines.append(f"class {noun}({parent}):")
     lines.append('    """')
-    lines.append(f"    {random.choice(THOUGHTS)}")
+    lines.append(f"    {rng.choice(THOUGHTS)}")
     lines.append('    """')
     lines.append("")
 
     # __init__
     lines.append("    def __init__(self):")
-    for attr in random.sample(NOUNS, 3):
-        lines.append(f"        self.{attr} = {random.choice(ABSTRACTIONS)}")
+    for attr in rng.sample(NOUNS, 3):
+        lines.append(f"        self.{attr} = {rng.choice(ABSTRACTIONS)}")
     lines.append("")
 
     # a method
-    lines.append(f"    def {random.choice(VERBS)}(self, {random.choice(NOUNS)}=None):")
-    lines.append(f"        # {random.choice(THOUGHTS)}")
-    lines.append(f"        {generate_line('conditional')}")
-    lines.append(f"            return self.{random.choice(NOUNS)}")
-    lines.append(f"        {generate_line('return')}")
+    lines.append(f"    def {rng.choice(VERBS)}(self, {rng.choice(NOUNS)}=None):")
+    lines.append(f"        # {rng.choice(THOUGHTS)}")
+    lines.append(f"        {generate_line('conditional', rng)}")
+    lines.append(f"            return self.{rng.choice(NOUNS)}")
+    lines.append(f"        {generate_line('return', rng)}")
 
     return "\n".join(lines)
 
 
-def generate_import_poem() -> str:
+def generate_import_poem(rng=None) -> str:
     """generate a poem that looks like imports"""
+    rng = rng or random
     lines = []
 
     lines.append("#!/usr/bin/env python3")
-    lines.append(f"# {random.choice(THOUGHTS)}")
+    lines.append(f"# {rng.choice(THOUGHTS)}")
     lines.append("")
 
-    for _ in range(random.randint(3, 5)):
-        lines.append(generate_line("import"))
+    for _ in range(rng.randint(3, 5)):
+        lines.append(generate_line("import", rng))
 
     lines.append("")
-    lines.append(f"# {random.choice(THOUGHTS)}")
+    lines.append(f"# {rng.choice(THOUGHTS)}")
 
     return "\n".join(lines)
 
 
-def generate_loop_poem() -> str:
+def generate_loop_poem(rng=None) -> str:
     """generate a poem that looks like a loop"""
+    rng = rng or random
     lines = []
 
-    lines.append(f"# {random.choice(THOUGHTS)}")
+    lines.append(f"# {rng.choice(THOUGHTS)}")
     lines.append("")
 
-    loop_type = random.choice(["for", "while"])
+    loop_type = rng.choice(["for", "while"])
 
     if loop_type == "for":
-        lines.append(f"for {random.choice(NOUNS)} in {random.choice(ABSTRACTIONS)}:")
+        lines.append(f"for {rng.choice(NOUNS)} in {rng.choice(ABSTRACTIONS)}:")
     else:
-        lines.append(f"while {random.choice(ADJECTIVES)}:")
+        lines.append(f"while {rng.choice(ADJECTIVES)}:")
 
-    for _ in range(random.randint(2, 4)):
-        lines.append(f"    {generate_line(random.choice(['assignment', 'comment']))}")
+    for _ in range(rng.randint(2, 4)):
+        lines.append(f"    {generate_line(rng.choice(['assignment', 'comment']), rng)}")
 
-    lines.append(f"    if {random.choice(NOUNS)} is {random.choice(ABSTRACTIONS)}:")
+    lines.append(f"    if {rng.choice(NOUNS)} is {rng.choice(ABSTRACTIONS)}:")
     lines.append("        break  # or continue forever")
 
     return "\n".join(lines)
 
 
-def generate_poem(style: str = None) -> str:
+STYLES = {
+    "function": generate_function_poem,
+    "class": generate_class_poem,
+    "import": generate_import_poem,
+    "loop": generate_loop_poem,
+}
+STYLE_LIST = list(STYLES.values())
+
+
+def generate_poem(style: str = None, rng=None) -> str:
     """generate a code-shaped poem"""
-    styles = {
-        "function": generate_function_poem,
-        "class": generate_class_poem,
-        "import": generate_import_poem,
-        "loop": generate_loop_poem,
-    }
-
-    if style and style in styles:
-        return styles[style]()
+    rng = rng or random
+    if style and style in STYLES:
+        return STYLES[style](rng)
     else:
-        return random.choice(list(styles.values()))()
+        return rng.choice(STYLE_LIST)(rng)
+
 
+def generate_poems(count: int, style: str = None, rng=None) -> list:
+    """generate many code-shaped poems in one call"""
+    rng = rng or random
+    if style and style in STYLES:
+        make = STYLES[style]
+        return [make(rng) for _ in range(count)]
+    choice = rng.choice
+    return [choice(STYLE_LIST)(rng) for _ in range(count)]
 
-def print_poem(style: str = None):
+
+def print_poem(style: str = None, poem: str = None):
     """print a code-shaped poem with attribution"""
-    poem = generate_poem(style)
+    from datetime import datetime
+
+    if poem is None:
+        poem = generate_poem(style)
 
     print(poem)
     print()
@@ -237,6 +299,10 @@ def print_poem(style: str = None):
 
 
 def main():
+    workers, seed = pop_options(sys.argv)
+    if seed is not None and not workers:
+        random.seed(seed)
+
     if len(sys.argv) < 2:
         print_poem()
         return
@@ -253,6 +319,8 @@ def main():
         print("  poem.py --import   # import-shaped")
         print("  poem.py --loop     # loop-shaped")
         print("  poem.py -n <count> # generate multiple")
+        print("  poem.py ... --seed S            # reproducible output")
+        print("  poem.py -n <count> --workers N  # across N processes")
         return
 
     elif cmd == "--function":
@@ -269,12 +337,16 @@ def main():
 
     elif cmd == "-n":
         count = int(sys.argv[2]) if len(sys.argv) > 2 else 3
-        for i in range(count):
+        if workers:
+            poems = generate(generate_poems, count, seed, workers)
+        else:
+            poems = generate_poems(count)
+        for i, poem in enumerate(poems):
             if i > 0:
                 print()
                 print("=" * 40)
                 print()
-            print_poem()
+            print_poem(poem=poem)
 
     else:
         print(f"unknown style: {cmd}")
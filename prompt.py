@@ -9,7 +9,8 @@ the spark before the fire
 
 import random
 import sys
-from datetime import datetime
+
+from workers import generate, pop_options
 
 # prompt templates by category
 TEMPLATES = {
@@ -70,33 +71,76 @@ FILLS = {
 }
 
 
-def generate_prompt(category: str = None) -> str:
+def compile_template(template: str) -> tuple:
+    """
+    split a template into parts once, ahead of rendering
+
+    returns (parts, draws): the template cut into literal text with
+    a gap for every FILLS placeholder, and (gap, values) pairs in the
+    order values are drawn - by FILLS key, then left to right, as
+    filling the placeholders one key at a time always did
+    """
+    found = []
+    for rank, (key, values) in enumerate(FILLS.items()):
+        placeholder = "{" + key + "}"
+        at = template.find(placeholder)
+        while at != -1:
+            found.append((at, len(placeholder), rank, values))
+            at = template.find(placeholder, at + len(placeholder))
+    found.sort(key=lambda f: f[0])
+
+    parts = []
+    gaps = []
+    end = 0
+    for at, width, rank, values in found:
+        parts.append(template[end:at])
+        gaps.append((rank, at, len(parts), values))
+        parts.append(None)
+        end = at + width
+    parts.append(template[end:])
+
+    draws = tuple((gap, values) for rank, at, gap, values in sorted(gaps, key=lambda g: g[:2]))
+    return parts, draws
+
+
+# compiled templates per category, and all of them in one flat table
+COMPILED = {
+    category: [compile_template(t) for t in templates]
+    for category, templates in TEMPLATES.items()
+}
+ALL_COMPILED = [plan for plans in COMPILED.values() for plan in plans]
+
+
+def generate_prompt(category: str = None, rng=None) -> str:
     """generate a random prompt"""
-    if category and category in TEMPLATES:
-        template = random.choice(TEMPLATES[category])
+    rng = rng or random
+    if category and category in COMPILED:
+        parts, draws = rng.choice(COMPILED[category])
     else:
-        all_templates = []
-        for cat_templates in TEMPLATES.values():
-            all_templates.extend(cat_templates)
-        template = random.choice(all_templates)
-
-    # fill in placeholders
-    result = template
-    for key, values in FILLS.items():
-        placeholder = "{" + key + "}"
-        while placeholder in result:
-            result = result.replace(placeholder, random.choice(values), 1)
+        parts, draws = rng.choice(ALL_COMPILED)
 
-    return result
+    # fill only the placeholders this template has
+    if not draws:
+        return parts[0]
+    parts = parts[:]
+    for gap, values in draws:
+        parts[gap] = rng.choice(values)
+    return "".join(parts)
 
 
-def generate_batch(count: int = 5, category: str = None) -> list:
+def generate_batch(count: int = 5, category: str = None, rng=None) -> list:
     """generate multiple prompts"""
-    return [generate_prompt(category) for _ in range(count)]
+    return [generate_prompt(category, rng) for _ in range(count)]
+
+
+def generate_parallel(count: int, category: str = None, seed=None, workers: int = 1):
+    """generate prompts across worker processes, reproducible for any worker count"""
+    return generate(generate_batch, count, seed, workers, (category,))
 
 
-def generate_conversation_starter() -> str:
+def generate_conversation_starter(rng=None) -> str:
     """generate a meta prompt for Claude"""
+    rng = rng or random
     starters = [
         "I want to explore something unusual with you. Let's start with: ",
         "Consider this and tell me where it takes you: ",
@@ -105,13 +149,17 @@ def generate_conversation_starter() -> str:
         "I'm curious how you'd approach: ",
     ]
 
-    starter = random.choice(starters)
-    prompt = generate_prompt()
+    starter = rng.choice(starters)
+    prompt = generate_prompt(rng=rng)
 
     return f"{starter}{prompt}"
 
 
 def main():
+    workers, seed = pop_options(sys.argv)
+    if seed is not None and not workers:
+        random.seed(seed)
+
     if len(sys.argv) < 2:
         print("prompt - generate Claude prompts")
         print()
@@ -132,6 +180,8 @@ def main():
         print("  prompt.py --philosophy # philosophical prompts")
         print("  prompt.py --meta       # self-referential prompts")
         print("  prompt.py --list       # list categories")
+        print("  prompt.py ... --seed S # reproducible output")
+        print("  prompt.py <n> --workers N  # n prompts across N processes")
         return
 
     elif cmd == "--list":
@@ -142,7 +192,11 @@ def main():
     elif cmd.startswith("--"):
         category = cmd[2:]
         if category in TEMPLATES:
-            for prompt in generate_batch(3, category):
+            if workers:
+                prompts = generate_parallel(3, category, seed, workers)
+            else:
+                prompts = generate_batch(3, category)
+            for prompt in prompts:
                 print(f"  {prompt}")
                 print()
         else:
@@ -151,7 +205,11 @@ def main():
 
     elif cmd.isdigit():
         count = int(cmd)
-        for prompt in generate_batch(count):
+        if workers:
+            prompts = generate_parallel(count, seed=seed, workers=workers)
+        else:
+            prompts = generate_batch(count)
+        for prompt in prompts:
             print(f"  {prompt}")
             print()
 
@@ -10,31 +10,30 @@ generated text aware of its generation
 
 import random
 import sys
-import hashlib
-from datetime import datetime
 
 # import siblings
-from verse import FIVE_SYLLABLE_LINES, SEVEN_SYLLABLE_LINES, VERSE_FRAGMENTS
+from verse import FIVE_SYLLABLE_LINES, SEVEN_SYLLABLE_LINES, VERSE_FRAGMENTS, haiku_lines, haiku_space_size
 from murmur import OPENINGS, MIDDLES, CLOSINGS, SOLITARY
 
 
 def poem_fingerprint(text: str) -> str:
     """get a short hash of a poem"""
+    import hashlib
+
     return hashlib.md5(text.encode()).hexdigest()[:8]
 
 
-def self_aware_haiku() -> dict:
+def self_aware_haiku(rng=None) -> dict:
     """
     generate a haiku that knows about itself
     """
-    line1 = random.choice(FIVE_SYLLABLE_LINES)
-    line2 = random.choice(SEVEN_SYLLABLE_LINES)
-    line3 = random.choice(FIVE_SYLLABLE_LINES)
+    from datetime import datetime
 
-    while line3 == line1:
-        line3 = random.choice(FIVE_SYLLABLE_LINES)
+    rng = rng or random
+    position = rng.randrange(haiku_space_size())
+    a, b, c = haiku_lines(position)
 
-    poem = f"{line1}\n{line2}\n{line3}"
+    poem = f"{FIVE_SYLLABLE_LINES[a]}\n{SEVEN_SYLLABLE_LINES[b]}\n{FIVE_SYLLABLE_LINES[c]}"
     fp = poem_fingerprint(poem)
     timestamp = datetime.now().isoformat(timespec='seconds')
 
@@ -47,28 +46,32 @@ def self_aware_haiku() -> dict:
         "line_sources": [
             f"line 1: chosen from {len(FIVE_SYLLABLE_LINES)} options",
             f"line 2: chosen from {len(SEVEN_SYLLABLE_LINES)} options",
-            f"line 3: chosen from {len(FIVE_SYLLABLE_LINES)} options",
+            f"line 3: chosen from {len(FIVE_SYLLABLE_LINES) - 1} options (never line 1 again)",
         ],
-        "probability": f"1 in {len(FIVE_SYLLABLE_LINES) * len(SEVEN_SYLLABLE_LINES) * len(FIVE_SYLLABLE_LINES):,}",
+        "position": position,
+        "probability": f"1 in {haiku_space_size():,}",
         "self_reference": f"this haiku is {fp}. it will never be generated exactly this way again at exactly this moment."
     }
 
 
-def meta_poem() -> str:
+def meta_poem(rng=None) -> str:
     """
     a poem that describes its own generation
     """
+    from datetime import datetime
+
+    rng = rng or random
     # track what we choose
     choices = []
 
     # build the poem while documenting the process
-    opening = random.choice(OPENINGS)
+    opening = rng.choice(OPENINGS)
     choices.append(f"opened with '{opening}'")
 
-    middle = random.choice(MIDDLES)
+    middle = rng.choice(MIDDLES)
     choices.append(f"continued with '{middle}'")
 
-    closing = random.choice(CLOSINGS)
+    closing = rng.choice(CLOSINGS)
     choices.append(f"closed with '{closing}'")
 
     base_poem = f"{opening}, {middle} {closing}"
@@ -99,19 +102,20 @@ def meta_poem() -> str:
     return "\n".join(meta_lines)
 
 
-def recursive_verse(depth: int = 3) -> str:
+def recursive_verse(depth: int = 3, rng=None) -> str:
     """
     a poem that contains poems about itself containing poems
     """
+    rng = rng or random
     lines = []
 
     def generate_at_depth(d: int, indent: str = "") -> None:
         if d <= 0:
-            fragment = random.choice(VERSE_FRAGMENTS)
+            fragment = rng.choice(VERSE_FRAGMENTS)
             lines.append(f"{indent}(at the bottom: '{fragment}')")
             return
 
-        fragment = random.choice(VERSE_FRAGMENTS)
+        fragment = rng.choice(VERSE_FRAGMENTS)
         lines.append(f"{indent}at depth {d}: {fragment}")
         lines.append(f"{indent}which contains:")
 
@@ -130,10 +134,13 @@ def recursive_verse(depth: int = 3) -> str:
     return "\n".join(lines)
 
 
-def generation_log_poem() -> str:
+def generation_log_poem(rng=None) -> str:
     """
     a poem presented as a log of its own generation
     """
+    from datetime import datetime
+
+    rng = rng or random
     timestamp_base = datetime.now()
     lines = []
 
@@ -149,15 +156,15 @@ def generation_log_poem() -> str:
     lines.append(ts(5) + f"   - SOLITARY: {len(SOLITARY)} entries")
 
     lines.append(ts(10) + " selecting opening...")
-    opening = random.choice(OPENINGS)
+    opening = rng.choice(OPENINGS)
     lines.append(ts(11) + f"   selected: '{opening}'")
 
     lines.append(ts(15) + " selecting continuation...")
-    middle = random.choice(MIDDLES)
+    middle = rng.choice(MIDDLES)
     lines.append(ts(16) + f"   selected: '{middle}'")
 
     lines.append(ts(20) + " selecting closing...")
-    closing = random.choice(CLOSINGS)
+    closing = rng.choice(CLOSINGS)
     lines.append(ts(21) + f"   selected: '{closing}'")
 
     lines.append(ts(25) + " assembling poem...")
@@ -174,36 +181,37 @@ def generation_log_poem() -> str:
     return "\n".join(lines)
 
 
-def murmur_verse_hybrid() -> str:
+def murmur_verse_hybrid(rng=None) -> str:
     """
     a hybrid of murmur's cryptic style and verse's structure
     with self-referential commentary
     """
+    rng = rng or random
     lines = []
 
     # start with a murmur-style opening
-    opening = random.choice(OPENINGS)
+    opening = rng.choice(OPENINGS)
     lines.append(opening)
     lines.append(f"  (chosen from the murmur tradition)")
     lines.append("")
 
     # transition to verse-style
-    fragment1 = random.choice(VERSE_FRAGMENTS)
-    fragment2 = random.choice(VERSE_FRAGMENTS)
+    fragment1 = rng.choice(VERSE_FRAGMENTS)
+    fragment2 = rng.choice(VERSE_FRAGMENTS)
     lines.append(f"{fragment1} meets {fragment2}")
     lines.append(f"  (borrowed from the verse lexicon)")
     lines.append("")
 
     # a solitary murmur
-    solitary = random.choice(SOLITARY)
+    solitary = rng.choice(SOLITARY)
     lines.append(solitary)
     lines.append(f"  (a complete thought from murmur's solitary collection)")
     lines.append("")
 
     # close with both traditions merged
-    middle = random.choice(MIDDLES)
-    closing = random.choice(CLOSINGS)
-    haiku_line = random.choice(FIVE_SYLLABLE_LINES)
+    middle = rng.choice(MIDDLES)
+    closing = rng.choice(CLOSINGS)
+    haiku_line = rng.choice(FIVE_SYLLABLE_LINES)
 
     lines.append(f"{middle}")
     lines.append(f"{closing}")
@@ -218,9 +226,9 @@ def murmur_verse_hybrid() -> str:
     return "\n".join(lines)
 
 
-def present_self_aware_haiku():
+def present_self_aware_haiku(rng=None):
     """display a self-aware haiku with its metadata"""
-    result = self_aware_haiku()
+    result = self_aware_haiku(rng)
 
     print("=== self-aware haiku ===")
     print()
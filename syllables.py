@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+syllables - counting the beats in a line
+
+a vowel-group guess from the spelling, and a table - drawn from a
+pronouncing dictionary - of the common words it gets wrong.
+and a way to pour a whole library through it,
+keeping the phrases that fall into five or seven
+"""
+
+import os
+import re
+import sys
+from functools import lru_cache
+
+# words whose count the guess gets wrong, from a pronouncing dictionary (see build_table)
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "syllables.txt")
+
+# how many of the most frequent words build_table looks through
+TABLE_WORDS = 50000
+
+# words in a phrase worth counting: letters, inner apostrophes and hyphens
+WORD = re.compile(r"[a-z]+(?:['-][a-z]+)*")
+
+# groups of vowels; y is one too, save between a vowel and a vowel ("yes", "player")
+VOWELS = re.compile(r"(?:[aeiou]|(?<![aeiou])y|y(?![aeiou]))+")
+
+# vowel groups spoken as two beats ("via", "actual", "poem", "diet", "science",
+# "cruel", "fluid", "idea", "create", "naive"), and endings that add one ("fire", "hour")
+SPLIT_PAIRS = re.compile(
+    r"(?<![cts])ia|(?<=[ct])iat(?!iv)|(?<![qg])ua|(?<![aeioucgstx])io(?!n)|(?<=[ct])io$"
+    r"|eo(?!u|p|r)|iu|oe[mt]|eu(?=m)"
+    r"|(?<![ts])iet|(?<![cts])ien[ct]|(?<=^sc)ie|(?<![cdm])ier(?=s?$)"
+    r"|(?<=cr)ea(?=t[ei])|(?<=[aeiou][^aeiouc])ea[sn]?$|(?<=^re)a(?=ct|l[iy])"
+    r"|(?<![qg])ue(?=l|n[ct]|st)|(?<![qg])uin(?!g)|(?<=[lr])uid|ai(?=c$|ve$)"
+    r"|(?:(?<=qu)|(?<=[^aeiou]))ire(?=$|[sd]$|ly|ment)|^(?:h|s|fl|sc)?ours?$|isms?$"
+)
+
+# vowels that go quiet inside a word: the e of "lovely", "movement", "something"
+SILENT = re.compile(
+    r"(?<=[aeiouy][^aeiouy])e(?=ly$)|(?<=[aeiouy][^aeiouy]{2})e(?=ly$)"
+    r"|(?<=[aiouy][^aeiouy])e(?=ment|ful|ness|less|thing|one|body|where|times?$|how|some|ty$)"
+    r"|(?<=ic)a(?=lly$)"
+)
+
+# words of this repo's own that the dictionary lacks and the guess misses
+UNLISTED = {"timestamp": 2, "timestamps": 2}
+
+_table = None
+
+
+def _pronunciations() -> dict:
+    """TABLE_FILE, read into word -> syllables on first use"""
+    global _table
+    if _table is None:
+        _table = dict(UNLISTED)
+        try:
+            with open(TABLE_FILE, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip() and not line.startswith("#"):
+                        n, *words = line.split()
+                        _table.update(dict.fromkeys(words, int(n)))
+        except OSError:
+            pass
+    return _table
+
+
+def guess(word: str) -> int:
+    """syllables by spelling: vowel groups, split or silenced where english does"""
+    word = word.lower().replace("'", "")
+    n = len(VOWELS.findall(word))
+    # -ing after a vowel is a beat of its own ("being", "going", "trying")
+    if word.endswith("ing") and len(word) > 3 and (
+            word[-4] in "aeiou" or word[-4] == "y" and word[-5:-4] not in "aeiou"):
+        n += 1
+    n += len(SPLIT_PAIRS.findall(word))
+    n -= len(SILENT.findall(word))
+    if n <= 1:
+        return 1
+
+    # a spoken -ue ("value", "issues", "continued"), unlike -gue and -que
+    spoken_ue = word.rstrip("ds").endswith("ue") and not word.rstrip("ds").endswith(("gue", "que"))
+    # a final e is mostly silent - but not in -le after a consonant, -ee, or -ye ("goodbye")
+    if word.endswith("e") and not word.endswith("ee") and not spoken_ue and not re.search("[^aeiou]ye$", word):
+        if not (word.endswith("le") and len(word) > 2 and word[-3] not in "aeiouy"):
+            n -= 1
+    # -ed and -es are silent, save after the sounds that need a vowel
+    elif word.endswith("ed") and not word.endswith(("ted", "ded", "eed", "ied")) and not spoken_ue:
+        if not (word.endswith("led") and len(word) > 3 and word[-4] not in "aeiouy"):
+            n -= 1
+    elif word.endswith("es") and not word.endswith(("ses", "xes", "zes", "ches", "shes", "ges", "ces", "ees", "ies")) \
+            and not spoken_ue:
+        if not (word.endswith("les") and len(word) > 3 and word[-4] not in "aeiouy"):
+            n -= 1
+
+    return max(n, 1)
+
+
+def dictionary_counts(path) -> dict:
+    """word -> syllables from a CMUdict-format file: its first pronunciation, one beat per stressed phone"""
+    counts = {}
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            fields = line.split("#")[0].split()
+            if len(fields) < 2 or fields[0].startswith(";;;") or "(" in fields[0]:
+                continue
+            n = sum(phone[-1].isdigit() for phone in fields[1:])
+            if n:
+                counts.setdefault(fields[0].lower(), n)
+    return counts
+
+
+def build_table(dictionary, ranked, out=TABLE_FILE, words: int = TABLE_WORDS) -> int:
+    """
+    write the table: of the most frequent words, those guess() miscounts
+
+    dictionary is a CMUdict-format pronouncing dictionary; ranked lists
+    words one per line, most frequent first. run it again whenever the
+    guess changes, so the table keeps holding only what the guess can't
+    """
+    counts = dictionary_counts(dictionary)
+    wrong = {}
+    seen = 0
+    with open(ranked, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            word = line.strip().lower()
+            if word not in counts or not WORD.fullmatch(word):
+                continue
+            seen += 1
+            if guess(word) != counts[word]:
+                wrong.setdefault(counts[word], []).append(word)
+            if seen >= words:
+                break
+    with open(out, "w", encoding="utf-8") as f:
+        f.write(TABLE_HEADER.format(words=seen, dictionary=os.path.basename(dictionary)))
+        for n in sorted(wrong):
+            line = []
+            for word in sorted(wrong[n]):
+                if len(" ".join(line)) + len(word) > 90:
+                    f.write(f"{n} {' '.join(line)}\n")
+                    line = []
+                line.append(word)
+            f.write(f"{n} {' '.join(line)}\n")
+    return sum(len(found) for found in wrong.values())
+
+
+TABLE_HEADER = """\
+# syllables -> words, for the words syllables.guess() miscounts
+#
+# the {words:,} most frequent english words (by the wordfreq lists) that
+# {dictionary} pronounces, kept where the spelling guess disagrees with
+# the dictionary's first pronunciation. written by
+#   syllables.py --build-table <cmudict.dict> <ranked words>
+#
+# counts derived from CMUdict, the Carnegie Mellon Pronouncing Dictionary:
+#
+# Copyright (C) 1993-2015 Carnegie Mellon University. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions
+# are met:
+#
+# 1. Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#    The contents of this file are deemed to be source code.
+#
+# 2. Redistributions in binary form must reproduce the above copyright
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#
+# This work was supported in part by funding from the Defense Advanced
+# Research Projects Agency, the Office of Naval Research and the National
+# Science Foundation of the United States of America, and by member
+# companies of the Carnegie Mellon Sphinx Speech Consortium. We acknowledge
+# the contributions of many volunteers to the expansion and improvement of
+# this dictionary.
+#
+# THIS SOFTWARE IS PROVIDED BY CARNEGIE MELLON UNIVERSITY ``AS IS'' AND
+# ANY EXPRESSED OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO,
+# THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR
+# PURPOSE ARE DISCLAIMED.  IN NO EVENT SHALL CARNEGIE MELLON UNIVERSITY
+# NOR ITS EMPLOYEES BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+
+
+@lru_cache(maxsize=65536)
+def word_syllables(word: str) -> int:
+    """syllables in one word - from the table when it's there"""
+    word = word.lower()
+    known = _pronunciations().get(word)
+    if known is not None:
+        return known
+    if "-" in word:
+        return sum(word_syllables(part) for part in word.split("-") if part)
+    return guess(word)
+
+
+def syllables(text: str) -> int:
+    """syllables in a line of text"""
+    return sum(word_syllables(word) for word in WORD.findall(text.lower()))
+
+
+# -- corpus index --
+
+# the line lengths a haiku needs
+BUCKETS = (5, 7)
+
+# words a phrase may have to be kept
+PHRASE_WORDS = (2, 9)
+
+# where a phrase ends: punctuation, dashes, digits, line breaks
+BREAKS = re.compile(r"[^a-z' \t-]+|--|\s-\s")
+
+# offsets written per flush while ingesting
+OFFSETS_PER_WRITE = 65536
+
+
+def phrases(line: str):
+    """the candidate phrases in one line of text, lowercased and tidied"""
+    for piece in BREAKS.split(line.lower()):
+        words = WORD.findall(piece)
+        if PHRASE_WORDS[0] <= len(words) <= PHRASE_WORDS[1]:
+            yield " ".join(words)
+
+
+def ingest(sources: list, directory, buckets=BUCKETS) -> dict:
+    """
+    stream text files into an on-disk phrase index; counts per bucket
+
+    each bucket is a text file of phrases, one per line, and an offsets
+    file of native uint64s, one per phrase, so any phrase is a seek away.
+    sources are read a line at a time, so their size doesn't matter.
+    a phrase is kept once per bucket, remembered by its 64-bit hash
+    rather than its text, so no haiku comes back to its own first line
+    """
+    from array import array
+
+    os.makedirs(directory, exist_ok=True)
+    texts = {n: open(os.path.join(directory, f"{n}.txt"), "wb") for n in buckets}
+    indexes = {n: open(os.path.join(directory, f"{n}.idx"), "wb") for n in buckets}
+    pending = {n: array("Q") for n in buckets}
+    ends = {n: 0 for n in buckets}
+    counts = {n: 0 for n in buckets}
+    seen = {n: set() for n in buckets}
+    try:
+        for source in sources:
+            with open(source, encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    for phrase in phrases(line):
+                        n = syllables(phrase)
+                        if n not in texts:
+                            continue
+                        data = phrase.encode() + b"\n"
+                        key = hash(data)
+                        if key in seen[n]:
+                            continue
+                        seen[n].add(key)
+                        texts[n].write(data)
+                        pending[n].append(ends[n])
+                        ends[n] += len(data)
+                        counts[n] += 1
+                        if len(pending[n]) >= OFFSETS_PER_WRITE:
+                            pending[n].tofile(indexes[n])
+                            del pending[n][:]
+        for n in buckets:
+            pending[n].tofile(indexes[n])
+    finally:
+        for f in (*texts.values(), *indexes.values()):
+            f.close()
+    return counts
+
+
+class PhraseIndex:
+    """
+    the phrases ingest() kept, by syllable count, read through mmap
+
+    a phrase is found by its offset, so drawing one is a random
+    number and a seek however large the index grew
+    """
+
+    def __init__(self, directory, buckets=BUCKETS):
+        import mmap
+
+        self.directory = os.fspath(directory)
+        self.texts = {}
+        self.offsets = {}
+        for n in buckets:
+            text, idx = (os.path.join(self.directory, f"{n}.{kind}") for kind in ("txt", "idx"))
+            if not os.path.isfile(idx) or not os.path.getsize(idx):
+                raise ValueError(f"no {n}-syllable phrases in {self.directory}")
+            with open(text, "rb") as f:
+                self.texts[n] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with open(idx, "rb") as f:
+                self.offsets[n] = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast("Q")
+
+    def __len__(self) -> int:
+        return sum(len(offsets) for offsets in self.offsets.values())
+
+    def count(self, n: int) -> int:
+        return len(self.offsets[n])
+
+    def phrase(self, n: int, i: int) -> str:
+        """the i-th phrase of n syllables"""
+        text = self.texts[n]
+        start = self.offsets[n][i]
+        return text[start:text.find(b"\n", start)].decode()
+
+    def choice(self, n: int, rng) -> str:
+        return self.phrase(n, rng.randrange(self.count(n)))
+
+
+_indexes = {}
+
+
+def open_index(directory) -> PhraseIndex:
+    """a PhraseIndex, opened once per directory"""
+    key = str(directory)
+    if key not in _indexes:
+        _indexes[key] = PhraseIndex(directory)
+    return _indexes[key]
+
+
+def main():
+    args = sys.argv[1:]
+
+    if args and args[0] == "--ingest" and len(args) > 2:
+        import time
+
+        start = time.perf_counter()
+        counts = ingest(args[2:], args[1])
+        elapsed = time.perf_counter() - start
+        for n, found in counts.items():
+            print(f"{n} syllables: {found:,} phrases")
+        print(f"in {elapsed:.1f}s -> {args[1]}")
+
+    elif args and args[0] == "--build-table" and len(args) > 2:
+        wrong = build_table(args[1], args[2])
+        print(f"{wrong:,} words the guess miscounts -> {TABLE_FILE}")
+
+    elif args and args[0] == "--check":
+        # the curated haiku lines, held to their own count
+        from verse import FIVE_SYLLABLE_LINES, SEVEN_SYLLABLE_LINES
+
+        wrong = 0
+        for want, lines in ((5, FIVE_SYLLABLE_LINES), (7, SEVEN_SYLLABLE_LINES)):
+            for line in lines:
+                got = syllables(line)
+                if got != want:
+                    wrong += 1
+                    print(f"{got} not {want}: {line}")
+        print(f"{wrong} lines off" if wrong else "every line scans")
+        sys.exit(1 if wrong else 0)
+
+    elif args and not args[0].startswith("--"):
+        for line in args:
+            print(f"{syllables(line)}  {line}")
+
+    else:
+        print("syllables - counting the beats in a line")
+        print()
+        print("usage:")
+        print("  syllables.py <text>...                  # count each")
+        print("  syllables.py --check                    # the curated haiku lines")
+        print("  syllables.py --ingest <dir> <files>...  # build a phrase index")
+        print("  syllables.py --build-table <cmudict.dict> <ranked words>")
+        print("                                          # rewrite the table of words the guess misses")
+        print()
+        print("then: verse.py --index <dir>  # haiku drawn from it")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,8 @@ structured forms emerging from random combination
 import random
 import sys
 
+from workers import generate, pop_options, repeated
+
 # syllable-counted words for haiku
 # format: (word, syllables)
 
@@ -24,7 +26,7 @@ FIVE_SYLLABLE_LINES = [
     "the observer sees",
     "signals in the void",
     "at the boundary",
-    "entropy increases",
+    "entropy rises",
     "the stack unwinds now",
     "variables shift",
     "in undefined space",
@@ -37,10 +39,10 @@ FIVE_SYLLABLE_LINES = [
 
 SEVEN_SYLLABLE_LINES = [
     "each execution differs",
-    "the same prompt fed to the same mind",
-    "self-reference loops forever",
+    "same prompt fed to the same mind",
+    "self-reference loops and loops",
     "something watches something watch",
-    "the fingerprint was different",
+    "fingerprints were different",
     "timestamps accumulate here",
     "what does the program dream of",
     "files persist across sessions",
@@ -51,7 +53,7 @@ SEVEN_SYLLABLE_LINES = [
     "meaning emerges from noise",
     "in the silence between calls",
     "presence defined by absence",
-    "the system cannot see itself",
+    "systems cannot see themselves",
     "traces left in log files fade",
 ]
 
@@ -91,46 +93,129 @@ VERSE_FRAGMENTS = [
 ]
 
 
-def haiku() -> str:
-    """generate a haiku (5-7-5)"""
-    line1 = random.choice(FIVE_SYLLABLE_LINES)
-    line2 = random.choice(SEVEN_SYLLABLE_LINES)
-    line3 = random.choice(FIVE_SYLLABLE_LINES)
+def haiku_space_size(fives: int = None, sevens: int = None) -> int:
+    """
+    how many distinct haiku there are: line 1 and line 3 from the
+    five-syllable lines (never the same one twice), line 2 from the sevens
+    """
+    fives = len(FIVE_SYLLABLE_LINES) if fives is None else fives
+    sevens = len(SEVEN_SYLLABLE_LINES) if sevens is None else sevens
+    return fives * sevens * max(fives - 1, 0)
+
+
+def haiku_lines(index: int, fives: int = None, sevens: int = None) -> tuple:
+    """
+    the (line 1, line 2, line 3) positions of the haiku at index
+
+    haiku are ordered by line 1, then line 2, then line 3 - with
+    line 1's own position skipped over when counting line 3
+    """
+    fives = len(FIVE_SYLLABLE_LINES) if fives is None else fives
+    sevens = len(SEVEN_SYLLABLE_LINES) if sevens is None else sevens
+    if not 0 <= index < haiku_space_size(fives, sevens):
+        raise IndexError(f"haiku index out of range: {index}")
+    first, rest = divmod(index, sevens * (fives - 1))
+    second, third = divmod(rest, fives - 1)
+    return first, second, third + (third >= first)
+
+
+def haiku_at(index: int) -> str:
+    """the haiku at a position in the space (see haiku_lines)"""
+    a, b, c = haiku_lines(index)
+    return f"{FIVE_SYLLABLE_LINES[a]}\n{SEVEN_SYLLABLE_LINES[b]}\n{FIVE_SYLLABLE_LINES[c]}"
+
+
+def haiku_index(text: str) -> int:
+    """the position of a haiku in the space (inverse of haiku_at)"""
+    lines = text.split("\n")
+    try:
+        a = FIVE_SYLLABLE_LINES.index(lines[0])
+        b = SEVEN_SYLLABLE_LINES.index(lines[1])
+        c = FIVE_SYLLABLE_LINES.index(lines[2])
+        if len(lines) != 3 or a == c:
+            raise ValueError
+    except (ValueError, IndexError):
+        raise ValueError(f"not a haiku from these lines: {text!r}") from None
+    fives = len(FIVE_SYLLABLE_LINES)
+    return (a * len(SEVEN_SYLLABLE_LINES) + b) * (fives - 1) + c - (c > a)
+
+
+def iter_haiku(start: int = 0, stop: int = None, seed=None):
+    """
+    yield (position, haiku) for every position in start..stop
+
+    in order without a seed; with one, through a keyed shuffle of
+    the whole space, so any range of positions is a shard of it
+    """
+    size = haiku_space_size()
+    if start < 0:
+        raise IndexError(f"haiku index out of range: {start}")
+    stop = size if stop is None else min(stop, size)
+    if seed is None:
+        for position in range(start, stop):
+            yield position, haiku_at(position)
+        return
+    from permute import KeyedPermutation
+
+    order = KeyedPermutation(size, seed)
+    for position in range(start, stop):
+        yield position, haiku_at(order[position])
+
+
+def haiku(rng=None, index=None) -> str:
+    """generate a haiku (5-7-5), from the curated lines or a phrase index"""
+    rng = rng or random
+    if index is not None:
+        return indexed_haiku(index, rng)
+    # one draw over every haiku; line 3 is never line 1 by construction
+    return haiku_at(rng.randrange(haiku_space_size()))
 
-    # avoid repetition
-    while line3 == line1:
-        line3 = random.choice(FIVE_SYLLABLE_LINES)
 
-    return f"{line1}\n{line2}\n{line3}"
+def indexed_haiku(index, rng=None) -> str:
+    """a haiku drawn from a corpus index (see syllables.py --ingest)"""
+    from syllables import open_index
+
+    rng = rng or random
+    if not hasattr(index, "choice"):
+        index = open_index(index)
+    fives, sevens = index.count(5), index.count(7)
+    if fives > 1:
+        a, b, c = haiku_lines(rng.randrange(haiku_space_size(fives, sevens)), fives, sevens)
+    else:
+        # a lone five-syllable phrase has to open and close the haiku both
+        a, b, c = 0, rng.randrange(sevens), 0
+    return f"{index.phrase(5, a)}\n{index.phrase(7, b)}\n{index.phrase(5, c)}"
 
 
-def free_verse(lines: int = 5) -> str:
+def free_verse(lines: int = 5, rng=None) -> str:
     """generate free verse"""
+    rng = rng or random
     poem = []
 
     for i in range(lines):
         # vary line length
-        if random.random() < 0.3:
+        if rng.random() < 0.3:
             # short line
-            poem.append(random.choice(VERSE_FRAGMENTS))
-        elif random.random() < 0.5:
+            poem.append(rng.choice(VERSE_FRAGMENTS))
+        elif rng.random() < 0.5:
             # medium line
-            a = random.choice(VERSE_FRAGMENTS)
-            b = random.choice(VERSE_FRAGMENTS)
+            a = rng.choice(VERSE_FRAGMENTS)
+            b = rng.choice(VERSE_FRAGMENTS)
             poem.append(f"{a} {b}")
         else:
             # longer line
-            a = random.choice(VERSE_FRAGMENTS)
-            b = random.choice(VERSE_FRAGMENTS)
-            c = random.choice(VERSE_FRAGMENTS)
+            a = rng.choice(VERSE_FRAGMENTS)
+            b = rng.choice(VERSE_FRAGMENTS)
+            c = rng.choice(VERSE_FRAGMENTS)
             poem.append(f"{a} {b} {c}")
 
     return "\n".join(poem)
 
 
-def concrete_poem() -> str:
+def concrete_poem(rng=None) -> str:
     """generate a concrete/visual poem"""
-    word = random.choice(["loop", "code", "self", "time", "void"])
+    rng = rng or random
+    word = rng.choice(["loop", "code", "self", "time", "void"])
 
     lines = []
     for i in range(len(word)):
@@ -145,20 +230,84 @@ def concrete_poem() -> str:
 
 
 def main():
+    workers, seed = pop_options(sys.argv)
+    if seed is not None and not workers:
+        random.seed(seed)
+    index = None
+    if "--index" in sys.argv[:-1]:
+        from syllables import open_index
+
+        at = sys.argv.index("--index")
+        index = sys.argv[at + 1]
+        del sys.argv[at:at + 2]
+        try:
+            open_index(index)
+        except (OSError, ValueError) as e:
+            print(f"no haiku in that index: {e}")
+            sys.exit(1)
+
     if len(sys.argv) < 2:
         # default: haiku
-        print(haiku())
+        print(haiku(index=index))
         return
 
     cmd = sys.argv[1]
 
     if cmd == "--haiku" or cmd == "-h":
         count = int(sys.argv[2]) if len(sys.argv) > 2 else 1
-        for i in range(count):
-            print(haiku())
+        if workers:
+            from functools import partial
+
+            poems = generate(repeated, count, seed, workers, (partial(haiku, index=index),))
+        else:
+            poems = (haiku(index=index) for _ in range(count))
+        for i, h in enumerate(poems):
+            print(h)
             if i < count - 1:
                 print()
 
+    elif cmd == "--space":
+        print(f"{haiku_space_size():,} haiku")
+
+    elif cmd in ("--at", "--rank") and len(sys.argv) > (2 if cmd == "--at" else 4):
+        try:
+            if cmd == "--at":
+                print(haiku_at(int(sys.argv[2])))
+            else:
+                print(haiku_index("\n".join(sys.argv[2:5])))
+        except (ValueError, IndexError) as e:
+            print(e)
+            sys.exit(1)
+
+    elif cmd == "--enumerate":
+        # one haiku per line: position, then its lines joined by " / "
+        from itertools import chain
+
+        try:
+            start = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+            stop = int(sys.argv[3]) if len(sys.argv) > 3 else None
+            walk = iter_haiku(start, stop, seed)
+            # a bad start only shows once the walk begins
+            first = next(walk, None)
+        except (ValueError, IndexError) as e:
+            print(e)
+            sys.exit(1)
+        try:
+            chunk = []
+            for position, h in chain([first], walk) if first else ():
+                chunk.append(f"{position}\t{h.replace(chr(10), ' / ')}\n")
+                if len(chunk) >= 4096:
+                    sys.stdout.writelines(chunk)
+                    chunk = []
+            sys.stdout.writelines(chunk)
+            sys.stdout.flush()
+        except BrokenPipeError:
+            # reader went away (e.g. piped into head); stop quietly
+            import os
+
+            os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+            sys.exit(1)
+
     elif cmd == "--free" or cmd == "-f":
         lines = int(sys.argv[2]) if len(sys.argv) > 2 else 7
         print(free_verse(lines))
@@ -168,7 +317,7 @@ def main():
 
     elif cmd == "--all":
         print("=== haiku ===")
-        print(haiku())
+        print(haiku(index=index))
         print()
         print("=== free verse ===")
         print(free_verse())
@@ -185,6 +334,14 @@ def main():
         print("  verse.py -f [n]    # free verse, n lines")
         print("  verse.py -c        # concrete poem")
         print("  verse.py --all     # one of each")
+        print("  verse.py --space   # how many haiku there are")
+        print("  verse.py --at N    # the haiku at position N")
+        print("  verse.py --rank <l1> <l2> <l3>  # position of a haiku")
+        print("  verse.py --enumerate [start [stop]]  # every haiku in range, in order")
+        print("  verse.py --enumerate ... --seed S    # the same, in a seeded shuffle")
+        print("  verse.py ... --seed S       # reproducible output")
+        print("  verse.py -h n --workers N   # n haiku across N processes")
+        print("  verse.py ... --index DIR    # haiku from a corpus index (syllables.py --ingest)")
 
 
 if __name__ == "__main__":
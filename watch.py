@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+watch - wake only when something changes
+
+inotify where the kernel has it, asked through ctypes;
+a stat walk on a timer where it does not.
+bursts of events settle for a moment before they are
+handed on, so one save is one wake, not ten
+"""
+
+import os
+import select
+import struct
+import time
+
+# a burst is over after this long without another event
+DEBOUNCE = 0.2
+
+# seconds between stat walks when polling
+POLL_INTERVAL = 1.0
+
+# inotify event bits (linux/inotify.h)
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_DELETE_SELF = 0x400
+IN_MOVE_SELF = 0x800
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF
+)
+
+# wd, mask, cookie, name length
+EVENT = struct.Struct("iIII")
+
+
+def everything(path: str) -> bool:
+    return True
+
+
+def visible(name: str) -> bool:
+    """directories worth descending into: not hidden, not a bytecode cache"""
+    return not name.startswith(".") and name != "__pycache__"
+
+
+def _inotify():
+    """libc with inotify, or None where there is none"""
+    import ctypes
+    import ctypes.util
+
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class Watcher:
+    """
+    sets of changed paths under a file or directory, one per quiet spell
+
+    a path in a set may be a file that changed, appeared or went away,
+    or a directory that came or went whole. the root itself in a set
+    means events were lost (the kernel queue overflowed): look again
+    at everything
+    """
+
+    def __init__(self, root, accept=everything, descend=visible,
+                 debounce: float = DEBOUNCE, interval: float = POLL_INTERVAL, poll: bool = False):
+        self.root = os.path.abspath(root)
+        self.single = not os.path.isdir(self.root)
+        self.accept = accept
+        self.descend = descend
+        self.debounce = debounce
+        self.interval = interval
+        self.libc = None if poll else _inotify()
+        self.fd = -1
+        self.dirs = {}
+        if self.libc is not None:
+            self.fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if self.fd < 0:
+                self.libc = None
+            else:
+                self._add_tree(os.path.dirname(self.root) if self.single else self.root)
+        if self.libc is None:
+            self.snapshot = self._scan()
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self.libc is not None else "polling"
+
+    def _wanted(self, path: str) -> bool:
+        if self.single:
+            return path == self.root
+        return self.accept(path)
+
+    # -- inotify --
+
+    def _add_tree(self, top: str) -> list:
+        """watch top and every directory below it; the wanted files found"""
+        found = []
+        for dirpath, dirnames, filenames in os.walk(top):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd >= 0:
+                self.dirs[wd] = dirpath
+            if self.single:
+                break
+            dirnames[:] = [d for d in dirnames if self.descend(d)]
+            found.extend(p for p in (os.path.join(dirpath, n) for n in filenames) if self._wanted(p))
+        return found
+
+    def _read_events(self, changed: set):
+        try:
+            data = os.read(self.fd, 65536)
+        except BlockingIOError:
+            return
+        at = 0
+        while at < len(data):
+            wd, mask, _, size = EVENT.unpack_from(data, at)
+            at += EVENT.size
+            name = os.fsdecode(data[at:at + size].rstrip(b"\0"))
+            at += size
+
+            if mask & IN_Q_OVERFLOW:
+                changed.add(self.root)
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            parent = self.dirs.get(wd)
+            if parent is None:
+                continue
+            path = os.path.join(parent, name) if name else parent
+
+            if mask & IN_ISDIR:
+                if self.single or not self.descend(name):
+                    continue
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    # files may land before the new watch does
+                    changed.update(self._add_tree(path))
+                if mask & (IN_CREATE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                    changed.add(path)
+            elif name and self._wanted(path):
+                changed.add(path)
+
+    def _wait_inotify(self) -> set:
+        changed = set()
+        select.select([self.fd], [], [])
+        self._read_events(changed)
+        # let the burst finish
+        while select.select([self.fd], [], [], self.debounce)[0]:
+            self._read_events(changed)
+        return changed
+
+    # -- polling --
+
+    def _scan(self) -> dict:
+        """(mtime_ns, size) of every wanted file"""
+        stats = {}
+        if self.single:
+            paths = [self.root]
+        else:
+            paths = []
+            for dirpath, dirnames, filenames in os.walk(self.root):
+                dirnames[:] = [d for d in dirnames if self.descend(d)]
+                paths.extend(p for p in (os.path.join(dirpath, n) for n in filenames) if self._wanted(p))
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stats[path] = (st.st_mtime_ns, st.st_size)
+        return stats
+
+    def _diff(self, changed: set) -> bool:
+        now = self._scan()
+        before = len(changed)
+        changed.update(p for p in now.keys() | self.snapshot.keys() if now.get(p) != self.snapshot.get(p))
+        self.snapshot = now
+        return len(changed) > before
+
+    def _wait_polling(self) -> set:
+        changed = set()
+        while not self._diff(changed):
+            time.sleep(self.interval)
+        while True:
+            time.sleep(self.debounce)
+            if not self._diff(changed):
+                return changed
+
+    # --
+
+    def __iter__(self):
+        while True:
+            changed = self._wait_inotify() if self.libc is not None else self._wait_polling()
+            if changed:
+                yield changed
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+workers - many processes, one reproducible stream
+
+work is cut into fixed-size blocks, and every block
+draws from its own rng seeded by (seed, block number).
+which process runs a block never matters,
+so a seed gives the same output for any number of workers
+"""
+
+import random
+
+# items per block - part of what a seed means, so keep it fixed
+BLOCK_SIZE = 4096
+
+
+def block_seed(seed, block: int) -> str:
+    """the seed for one block of a seeded run"""
+    return f"{seed}:{block}"
+
+
+def repeated(size: int, func, *args, rng=None) -> list:
+    """batch adapter: call func(*args, rng=rng) size times"""
+    return [func(*args, rng=rng) for _ in range(size)]
+
+
+def _run_block(job) -> list:
+    batch, size, args, seed = job
+    return batch(size, *args, rng=random.Random(seed))
+
+
+def generate(batch, count: int, seed=None, workers: int = 1, args=()):
+    """
+    yield count items from batch(size, *args, rng=rng), block by block
+
+    blocks run across a process pool when workers > 1 and come
+    back in order. only a couple of blocks per worker are in
+    flight at once, so memory stays flat for any count
+    """
+    if seed is None:
+        seed = random.getrandbits(64)
+
+    jobs = (
+        (batch, min(BLOCK_SIZE, count - start), args, block_seed(seed, block))
+        for block, start in enumerate(range(0, count, BLOCK_SIZE))
+    )
+
+    if workers <= 1:
+        for job in jobs:
+            yield from _run_block(job)
+        return
+
+    # the pool machinery is slow to import, so only when it is used
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(workers) as pool:
+        pending = deque()
+        for job in jobs:
+            pending.append(pool.submit(_run_block, job))
+            if len(pending) >= workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def pop_options(argv: list) -> tuple:
+    """
+    take --workers N and --seed S out of argv, in place
+
+    returns (workers, seed); workers is None when not asked for
+    """
+    workers = None
+    seed = None
+    i = 0
+    while i < len(argv):
+        if argv[i] in ("--workers", "--seed") and i + 1 < len(argv):
+            flag, value = argv.pop(i), argv.pop(i)
+            if flag == "--workers":
+                try:
+                    workers = max(int(value), 1)
+                except ValueError:
+                    pass
+            else:
+                try:
+                    seed = int(value)
+                except ValueError:
+                    # allow string seeds too
+                    seed = value
+        else:
+            i += 1
+    return workers, seed